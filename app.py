@@ -5,9 +5,15 @@ import pandas as pd
 import geopandas as gpd
 import numpy as np
 import json
-from src.data_loader import load_data
-from src.utils import compute_socio_score, compute_access_score, compute_double_vulnerability, load_sante_variables, load_socio_variables
-from src.variables import CHEMIN_COMMUNES, CHEMIN_DEPARTEMENTS, CHEMIN_GEOJSON, COLUMN_MAPPING
+from src.data_loader import load_data, load_communes_departement
+from src.utils import get_scoring_engine, load_sante_variables, load_socio_variables
+from src.scoring import ScoringEngine
+from src.graph import ComputationGraph
+from src.ranking import ClassementNational, top_k
+from src.reechantillonnage import intervalles_rangs
+from src.lissage import lisser_communes
+from src.registry import get_registry
+from src.variables import CHEMIN_COMMUNES, CHEMIN_DEPARTEMENTS, CHEMIN_GEOMETRIE_DEPARTEMENTS, CHEMIN_GEOJSON, COLUMN_MAPPING, TAILLE_CLASSEMENT
 from src.visualizer import plot_map
 
 # ===========================
@@ -20,6 +26,118 @@ st.set_page_config(
 )
 
 
+# ===========================
+# Graphe de calcul des scores
+# ===========================
+
+def select_view(scope_mode, code_dep, df_communes, df_departements):
+    """
+    Retourne les unités du périmètre : tous les départements en mode France,
+    toutes les communes en mode France (communes), les communes du département choisi en mode Département.
+    """
+    df_view = pd.DataFrame()
+
+    if scope_mode == "France":
+        if df_departements is not None and not df_departements.empty:
+            # Table partagée en lecture seule (géométrie comprise) : pas de copie
+            df_view = df_departements
+
+    elif scope_mode == "France (communes)":
+        if df_communes is not None and not df_communes.empty:
+            # Toutes les communes (table partagée, pas de copie) : agrégées en hexagones pour l'affichage
+            df_view = df_communes
+
+    elif scope_mode == "Département" and code_dep:
+        # Partition pré-calculée du département (cache LRU), sinon filtrage de la table complète
+        df_view = load_communes_departement(code_dep)
+        if df_view is None and df_communes is not None and not df_communes.empty:
+            mask = df_communes["code_insee"].astype(str).str.startswith(code_dep)
+            df_view = df_communes.loc[mask].copy()
+            df_view = df_view.reset_index(drop=True)
+        elif df_view is None:
+            df_view = pd.DataFrame()
+
+    return df_view
+
+
+def build_score_graph(df_communes, df_departements):
+    """
+    Déclare les étapes de calcul et leurs dépendances :
+    périmètre -> vue -> données (lissées ou non) -> moteur -> score socio (poids) / score accès (profession) -> score double (alpha),
+    et la même chaîne sur toutes les communes de France pour l'index de classement national.
+    """
+    def _view(scope_mode, code_dep):
+        print(f"🔄 Sélection du périmètre {scope_mode} {code_dep or ''}")
+        return select_view(scope_mode, code_dep, df_communes, df_departements)
+
+    def _donnees(view, scope_mode, lissage):
+        # Lissage bayésien des taux communaux vers la moyenne de leur département (communes uniquement)
+        if not lissage or scope_mode == "France" or view is None or view.empty:
+            return view
+        print("🔄 Lissage des indicateurs des communes vers la moyenne de leur département")
+        return lisser_communes(view, get_registry().colonnes_taux("communes"))
+
+    def _engine(donnees, scope_mode):
+        return get_scoring_engine(donnees, scope_mode)
+
+    def _socio(engine, selected_vars, weights):
+        print("🔄 Calcul du score socio-économique avec les variables :", selected_vars)
+        return engine.score_socio(selected_vars or [], weights or {})
+
+    def _access(engine, access_col):
+        print(f"🔄 Calcul du score d'accès aux soins à partir de la colonne {access_col}")
+        return engine.score_acces(access_col)
+
+    def _double(socio, access, alpha):
+        print(f"🔄 Calcul du score de double vulnérabilité avec alpha={alpha}")
+        return ScoringEngine.score_double(socio, access, alpha)
+
+    def _national_donnees(lissage):
+        return _donnees(df_communes, "France (communes)", lissage)
+
+    def _national_engine(national_donnees):
+        print("🔄 Construction du moteur de scores sur toutes les communes")
+        return get_scoring_engine(national_donnees, "France (communes)")
+
+    def _national_socio(national_engine, selected_vars, weights):
+        return _socio(national_engine, selected_vars, weights)
+
+    def _national_access(national_engine, access_col):
+        return _access(national_engine, access_col)
+
+    def _national_double(national_socio, national_access, alpha):
+        return _double(national_socio, national_access, alpha)
+
+    def _intervalles(engine, donnees, selected_vars, weights, access_col, alpha):
+        print("🔄 Rééchantillonnage des indicateurs pour les intervalles de confiance des rangs")
+        return intervalles_rangs(engine, donnees, selected_vars or [], weights or {}, access_col, alpha)
+
+    def _classement(national_double):
+        print("🔄 Construction de l'index de classement national des communes")
+        return ClassementNational(national_double, df_communes["code_insee"])
+
+    graph = ComputationGraph()
+    graph.add_node("view", _view, inputs=("scope_mode", "code_dep"))
+    graph.add_node("donnees", _donnees, inputs=("scope_mode", "lissage"), deps=("view",))
+    graph.add_node("engine", _engine, inputs=("scope_mode",), deps=("donnees",))
+    graph.add_node("socio", _socio, inputs=("selected_vars", "weights"), deps=("engine",))
+    graph.add_node("access", _access, inputs=("access_col",), deps=("engine",))
+    graph.add_node("double", _double, inputs=("alpha",), deps=("socio", "access"))
+    graph.add_node(
+        "intervalles", _intervalles,
+        inputs=("selected_vars", "weights", "access_col", "alpha"), deps=("engine", "donnees"),
+    )
+
+    # Mêmes scores sur toutes les communes de France : rangs nationaux et départementaux
+    graph.add_node("national_donnees", _national_donnees, inputs=("lissage",))
+    graph.add_node("national_engine", _national_engine, deps=("national_donnees",))
+    graph.add_node("national_socio", _national_socio, inputs=("selected_vars", "weights"), deps=("national_engine",))
+    graph.add_node("national_access", _national_access, inputs=("access_col",), deps=("national_engine",))
+    graph.add_node("national_double", _national_double, inputs=("alpha",), deps=("national_socio", "national_access"))
+    graph.add_node("classement", _classement, deps=("national_double",))
+    return graph
+
+
 def main():
     print("\n✴️  Rerun de la page")
     # -----------------------
@@ -46,7 +164,7 @@ def main():
     st.divider()
 
     # Chargement des dataframes
-    df_communes, df_departements = load_data(CHEMIN_COMMUNES, CHEMIN_DEPARTEMENTS, CHEMIN_GEOJSON)
+    df_communes, df_departements = load_data(CHEMIN_COMMUNES, CHEMIN_DEPARTEMENTS, CHEMIN_GEOMETRIE_DEPARTEMENTS, CHEMIN_GEOJSON)
 
     # ===========================
     # SIDEBAR : Paramètres globaux
@@ -64,6 +182,33 @@ def main():
         help="α = 1 → 100% socio-économique, α = 0 → 100% accès aux soins"
     )
 
+    # Mode d'affichage des cartes
+    modes_rendu = {
+        "Standard": "pydeck",
+        "Recoloration rapide": "navigateur",
+        "Tuiles vectorielles": "tuiles",
+    }
+    rendu = modes_rendu[st.sidebar.selectbox(
+        "Rendu des cartes",
+        options=list(modes_rendu),
+        help=(
+            "Recoloration rapide : la géométrie est envoyée une seule fois au navigateur, "
+            "les curseurs ne transmettent plus que les nouvelles couleurs. "
+            "Tuiles vectorielles : les contours sont lus depuis des tuiles locales (static/tiles), "
+            "seules les couleurs sont envoyées."
+        ),
+    )]
+
+    # Lissage des indicateurs des petites communes
+    lissage = st.sidebar.checkbox(
+        "Lisser les indicateurs des petites communes",
+        help=(
+            "Les taux (pauvreté, familles monoparentales, 75 ans et +) des communes peu peuplées "
+            "sont rapprochés de la moyenne de leur département, d'autant plus que la commune est petite "
+            "(lissage bayésien empirique). S'applique aux scores des communes."
+        ),
+    )
+
     # 2) Choix du périmètre
     st.sidebar.header("Périmètre des données :")
 
@@ -73,7 +218,7 @@ def main():
 
     scope_mode = st.sidebar.radio(
         "Sélectionnez le périmètre",
-        ["France", "Département"],
+        ["France", "Département", "France (communes)"],
     )
 
     st.session_state.scope_mode = scope_mode
@@ -86,13 +231,10 @@ def main():
         dep_options = []
         if df_departements is not None and not df_departements.empty:
             # Obtient les codes triés (ex: '01', '02', '03'...)
-            df_departements = df_departements.sort_values("code_insee")
-            
+            df_deps_tries = df_departements[["code_insee", "nom_departement"]].sort_values("code_insee")
+
             # Construit la liste d'options au format "Code - Nom"
-            dep_options = df_departements.apply(
-                lambda row: f"{row['code_insee']} - {row['nom_departement']}",
-                axis=1
-            ).tolist()
+            dep_options = (df_deps_tries["code_insee"] + " - " + df_deps_tries["nom_departement"]).tolist()
 
         selected_dep = st.sidebar.selectbox(
             "Département",
@@ -100,8 +242,6 @@ def main():
             key="selected_dep"
         )
 
-    df_view = pd.DataFrame() 
-
     # 3) Filtrage des données en fonction du périmètre
     code_dep_selected = None
     if selected_dep and " - " in selected_dep:
@@ -109,16 +249,13 @@ def main():
     elif selected_dep and len(selected_dep) <= 2 and selected_dep.isdigit():
         code_dep_selected = selected_dep
 
-    if scope_mode == "France":
-        if df_departements is not None and not df_departements.empty:
-            df_view = df_departements.copy()
-            df_view = df_view.reset_index(drop=True)
+    # Graphe de calcul de la session : seuls les nœuds dont une entrée a changé sont recalculés
+    if "score_graph" not in st.session_state:
+        st.session_state.score_graph = build_score_graph(df_communes, df_departements)
+    graph = st.session_state.score_graph
 
-    elif scope_mode == "Département" and code_dep_selected:    
-        if df_communes is not None and not df_communes.empty:
-            mask = df_communes["code_insee"].astype(str).str.startswith(code_dep_selected)
-            df_view = df_communes.loc[mask].copy()
-            df_view = df_view.reset_index(drop=True)
+    graph.set_inputs(scope_mode=scope_mode, code_dep=code_dep_selected, lissage=lissage)
+    df_view = graph.get("view")
 
 
     # ===========================
@@ -214,7 +351,9 @@ def main():
         weights = {crit: weights.get(crit, 0.0) for crit in selected_vars}
 
     # Calcul du score socio-éco
-    df_socio = compute_socio_score(df_view, selected_vars, weights, scope_mode)
+    # Les scores sont gardés dans un DataFrame léger (sans géométrie) aligné sur df_view
+    graph.set_inputs(selected_vars=selected_vars, weights=weights)
+    df_scores = pd.DataFrame({"score_socio": graph.get("socio")}, index=df_view.index)
 
     # Mini-cartes par variable
     if selected_vars:
@@ -230,18 +369,18 @@ def main():
                     scope_mode=scope_mode,
                     type_data="socio",
                     df_scores=None,
-                    change_var=[code_dep_selected]
+                    rendu=rendu
                 )
 
     # Carte du score socio-éco
     plot_map(
         title="Votre score socio-économique : ",
         col_name="score_socio",
-        data=df_socio,
+        data=df_view,
         scope_mode=scope_mode,
         type_data="socio",
-        df_scores=df_socio,
-        change_var=[code_dep_selected, selected_vars, weights]
+        df_scores=df_scores,
+        rendu=rendu
     )
 
     st.divider()
@@ -278,16 +417,17 @@ def main():
 
 
     # Calcul du score d'accès
-    df_access = compute_access_score(df_socio, access_col, scope_mode)
+    graph.set_inputs(access_col=access_col)
+    df_scores["score_acces"] = graph.get("access")
 
     with col_access_right:
         plot_map(
             title=f"Accessibilité Potentielle Localisée – {prof_label}",
             col_name=access_col,
-            data=df_access,
+            data=df_view,
             scope_mode=scope_mode,
             type_data="sante",
-            change_var=[code_dep_selected, access_col]
+            rendu=rendu
         )
 
 
@@ -307,17 +447,18 @@ def main():
     )
 
     # Calcul du score final
-    df_final = compute_double_vulnerability(df_access, alpha)
+    graph.set_inputs(alpha=alpha)
+    df_scores["score_double"] = graph.get("double")
 
     # Carte finale
     plot_map(
         title="Score de double vulnérabilité",
         col_name="score_double",
-        data=df_final,
+        data=df_view,
         scope_mode=scope_mode,
         type_data="socio",
-        df_scores=df_final,
-        change_var=[code_dep_selected, access_col, alpha, weights, selected_vars]
+        df_scores=df_scores,
+        rendu=rendu
     )
     # Tableau de classement
 
@@ -337,21 +478,68 @@ def main():
             """
         )
 
+    elif scope_mode == "France (communes)":
+        st.subheader("Classement des communes")
+        st.markdown(
+            """
+            Découvrez les **10 communes les plus vulnérables** de France, classées du **score le plus élevé** (vulnérabilité forte) au **moins élevé**.  
+            """
+        )
+
+    # Intervalles de confiance des rangs : calcul interactif sur un département ou les départements
+    show_intervals = False
+    if scope_mode in ("France", "Département"):
+        show_intervals = st.checkbox(
+            "Afficher l'intervalle de confiance des rangs (90 %)",
+            help=(
+                "Les indicateurs en % sont rééchantillonnés selon la population de chaque unité : "
+                "le rang d'une commune de quelques dizaines d'habitants est beaucoup plus incertain "
+                "que celui d'une ville."
+            ),
+        )
+
     required_cols = ["score_double", "score_socio", "score_acces"]
-    if all(col in df_final.columns for col in required_cols):
+    if all(col in df_scores.columns for col in required_cols):
         all_scores_computed = all(
-            df_final[col].notna().any() for col in required_cols
+            df_scores[col].notna().any() for col in required_cols
         )
 
         if all_scores_computed:
-            if scope_mode == "Département":
-                cols_to_show = [c for c in ["nom_commune", "code_postal", "score_double",  "score_socio", access_col, "population_totale"] if c in df_final.columns]
+            if scope_mode in ("Département", "France (communes)"):
+                cols_to_show = ["nom_commune", "code_postal", "score_double",  "score_socio", access_col, "population_totale"]
             else: 
-                cols_to_show = [c for c in ["nom_departement", "code_insee", "score_double",  "score_socio", access_col, "population_totale"] if c in df_final.columns]
+                cols_to_show = ["nom_departement", "code_insee", "score_double",  "score_socio", access_col, "population_totale"]
+
+            # Sélection des K premières unités sans trier tout le périmètre
+            positions = top_k(df_scores["score_double"].to_numpy(), TAILLE_CLASSEMENT)
+
+            # Assembler uniquement les lignes et colonnes affichées (attributs de la vue + scores)
+            df_display = pd.concat(
+                [
+                    df_view[[c for c in cols_to_show if c in df_view.columns and c not in df_scores.columns]].iloc[positions],
+                    df_scores.iloc[positions],
+                ],
+                axis=1,
+            )
+            cols_to_show = [c for c in cols_to_show if c in df_display.columns]
+            df_display = df_display[cols_to_show]
+
+            # Rangs des communes parmi toutes les communes de France et de leur département
+            if scope_mode in ("Département", "France (communes)") and df_communes is not None and not df_communes.empty:
+                classement = graph.get("classement")
+                top_scores = df_display["score_double"].to_numpy()
+                codes_insee = df_view["code_insee"].iloc[positions]
+                df_display["rang_departemental"] = pd.array(classement.rang_departemental(top_scores, codes_insee), dtype="Int64")
+                df_display["rang_national"] = pd.array(classement.rang_national(top_scores), dtype="Int64")
+                df_display["percentile_national"] = classement.percentile_national(top_scores)
+                cols_to_show += ["rang_departemental", "rang_national", "percentile_national"]
+
+            if show_intervals:
+                intervalles = graph.get("intervalles").iloc[positions]
+                df_display["rang_ic_bas"] = pd.array(intervalles["rang_ic_bas"].to_numpy(), dtype="Int64")
+                df_display["rang_ic_haut"] = pd.array(intervalles["rang_ic_haut"].to_numpy(), dtype="Int64")
+                cols_to_show += ["rang_ic_bas", "rang_ic_haut"]
 
-            # Créer une copie du DataFrame pour la modification
-            df_display = df_final[cols_to_show].copy()
-            
             #Renommer les colonnes dans le DataFrame d'affichage
             renaming_dict = {
                 original_col: new_name 
@@ -359,11 +547,7 @@ def main():
                 if original_col in cols_to_show
             }
         
-            df_display.rename(columns=renaming_dict, inplace=True)
-
-            # Trier et Afficher (en utilisant le NOUVEAU nom de la colonne de tri)
-            sort_column_name = COLUMN_MAPPING.get("score_double", "score_double") # Récupère le nouveau nom ou garde l'ancien par défaut
-            df_display = df_display.sort_values(sort_column_name, ascending=False).reset_index(drop=True).head(20)
+            df_display = df_display.rename(columns=renaming_dict).reset_index(drop=True)
             df_display.index = df_display.index + 1
             st.dataframe(df_display)
         else:
@@ -0,0 +1,120 @@
+import numpy as np
+
+from src.cache import LRUCache, array_fingerprint
+
+# ===========================
+# Agrégation des communes en hexagones
+# ===========================
+
+class GrilleHexagonale:
+    """
+    Répartit des communes (lon/lat) dans une grille d'hexagones, une seule fois,
+    puis agrège n'importe quelle colonne de valeurs par hexagone en quelques
+    np.bincount : moyenne pondérée par la population, nombre de communes, population.
+
+    Les hexagones sont construits dans un plan où la longitude est corrigée par
+    cos(latitude de référence), pour qu'ils restent à peu près réguliers sur la France.
+    """
+
+    def __init__(self, lon, lat, poids, taille, lat_reference=46.6, taille_cache=16):
+        """
+        Args:
+            lon, lat (array-like): Coordonnées des communes (NaN -> commune ignorée).
+            poids (array-like): Poids des communes (population) ; NaN ou négatif -> 0.
+            taille (float): Rayon des hexagones en degrés de latitude.
+            lat_reference (float): Latitude utilisée pour corriger la longitude.
+            taille_cache (int): Nombre d'agrégations gardées en cache (une par scénario).
+        """
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        poids = np.asarray(poids, dtype=np.float64)
+
+        self.taille = taille
+        self.echelle_lon = np.cos(np.radians(lat_reference))
+        self.poids = np.where(np.isfinite(poids) & (poids > 0), poids, 0.0)
+
+        # Coordonnées axiales (q, r) de l'hexagone de chaque commune (hexagones "pointe en haut")
+        valides = np.isfinite(lon) & np.isfinite(lat)
+        x = lon * self.echelle_lon / taille
+        y = lat / taille
+        q, r = self._arrondir_hex(np.sqrt(3) / 3 * x - y / 3, 2 / 3 * y)
+
+        # Numérotation compacte des hexagones non vides
+        cles = np.where(valides, q * 1_000_003 + r, np.iinfo(np.int64).min)
+        cles_uniques, inverse = np.unique(cles[valides], return_inverse=True)
+        self.cellule = np.full(len(lon), -1, dtype=np.int64)
+        self.cellule[valides] = inverse
+        self.nb_cellules = len(cles_uniques)
+
+        premiers = np.zeros(self.nb_cellules, dtype=np.int64)
+        premiers[inverse[::-1]] = np.flatnonzero(valides)[::-1]
+        self.q = q[premiers]
+        self.r = r[premiers]
+
+        self.nb_communes = np.bincount(self.cellule[valides], minlength=self.nb_cellules)
+        self.population = np.bincount(self.cellule[valides], weights=self.poids[valides], minlength=self.nb_cellules)
+
+        self._cache = LRUCache(maxsize=taille_cache)
+
+    @staticmethod
+    def _arrondir_hex(q, r):
+        """Arrondi cubique vectorisé de coordonnées axiales fractionnaires."""
+        s = -q - r
+        rq, rr, rs = np.round(q), np.round(r), np.round(s)
+        dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+        corrige_q = (dq > dr) & (dq > ds)
+        corrige_r = ~corrige_q & (dr > ds)
+        rq = np.where(corrige_q, -rr - rs, rq)
+        rr = np.where(corrige_r, -rq - rs, rr)
+        q = np.nan_to_num(rq, nan=0).astype(np.int64)
+        r = np.nan_to_num(rr, nan=0).astype(np.int64)
+        return q, r
+
+    def centres(self):
+        """Centres des hexagones : tableau (nb_cellules, 2) de [lon, lat]."""
+        x = self.taille * np.sqrt(3) * (self.q + self.r / 2)
+        y = self.taille * 1.5 * self.r
+        return np.column_stack([x / self.echelle_lon, y])
+
+    def polygones(self):
+        """Sommets des hexagones : tableau (nb_cellules, 7, 2) de [lon, lat] (anneau fermé)."""
+        angles = np.radians(30 + 60 * np.arange(7))
+        centres = self.centres()
+        dx = self.taille * np.cos(angles) / self.echelle_lon
+        dy = self.taille * np.sin(angles)
+        return np.stack([centres[:, :1] + dx, centres[:, 1:] + dy], axis=-1)
+
+    def agreger(self, valeurs):
+        """
+        Moyenne des valeurs par hexagone, pondérée par la population.
+        Les communes sans valeur sont ignorées ; un hexagone sans population renseignée
+        prend la moyenne simple de ses communes, et NaN s'il n'a aucune valeur.
+
+        Args:
+            valeurs (array-like): Une valeur par commune, dans l'ordre de construction.
+
+        Returns:
+            np.ndarray: Une valeur par hexagone.
+        """
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        cle = array_fingerprint(valeurs)
+        resultat = self._cache.get(cle)
+        if resultat is not None:
+            return resultat
+
+        utiles = (self.cellule >= 0) & np.isfinite(valeurs)
+        cellule = self.cellule[utiles]
+        v = valeurs[utiles]
+        w = self.poids[utiles]
+
+        somme_w = np.bincount(cellule, weights=w, minlength=self.nb_cellules)
+        somme_wv = np.bincount(cellule, weights=w * v, minlength=self.nb_cellules)
+        nb = np.bincount(cellule, minlength=self.nb_cellules)
+        somme_v = np.bincount(cellule, weights=v, minlength=self.nb_cellules)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            resultat = np.where(somme_w > 0, somme_wv / somme_w, somme_v / nb)
+        resultat = np.round(resultat, 2)
+
+        self._cache.put(cle, resultat)
+        return resultat
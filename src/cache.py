@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.graph import fingerprint
+
+# ===========================
+# Cache LRU borné avec empreintes de contenu
+# ===========================
+
+def array_fingerprint(values):
+    """
+    Empreinte rapide du contenu d'un vecteur (valeurs numériques ou chaînes).
+    Deux vecteurs de même contenu ont la même empreinte, quelle que soit leur provenance.
+    """
+    if isinstance(values, (pd.Series, pd.Index)) and not pd.api.types.is_numeric_dtype(values):
+        octets = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy().tobytes()
+    else:
+        octets = np.ascontiguousarray(np.asarray(values, dtype=np.float64)).tobytes()
+    return hashlib.blake2b(octets, digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """
+    Cache clé -> valeur de taille bornée, avec éviction du moins récemment utilisé
+    et compteurs de hits / misses. Partagé entre les sessions, donc protégé par un verrou.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._donnees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._verrou:
+            if key in self._donnees:
+                self._donnees.move_to_end(key)
+                self.hits += 1
+                return self._donnees[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._verrou:
+            self._donnees[key] = value
+            self._donnees.move_to_end(key)
+            while len(self._donnees) > self.maxsize:
+                self._donnees.popitem(last=False)
+
+    def __len__(self):
+        return len(self._donnees)
+
+    def stats(self):
+        """Retourne {hits, misses, size, maxsize}."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self), "maxsize": self.maxsize}
+
+
+def make_key(*parties):
+    """Construit une clé de cache à partir d'empreintes et de valeurs simples."""
+    return fingerprint(list(parties))
@@ -3,15 +3,86 @@ import pandas as pd
 import geopandas as gpd
 import json
 import os
+from functools import lru_cache
+from src.variables import DOSSIER_COMMUNES_DEPARTEMENTS, DOSSIER_GEOMETRIE_COMMUNES, GEOMETRIE_AFFICHEE, TAILLE_CACHE_DEPARTEMENTS
 
-@st.cache_data
-def load_data(chemin_communes, chemin_departements, chemin_geojson):
+
+def lire_table(chemin_json):
+    """
+    Charge une table {code: {attribut: valeur}} sous forme de DataFrame avec une colonne 'code_insee'.
+    Si un fichier Parquet de même nom existe à côté du JSON (généré par fusion_json.py)
+    et qu'il n'est pas plus ancien que le JSON, il est lu directement ; sinon on se rabat sur le JSON
+    (un script qui n'aurait réécrit que le JSON ne doit pas laisser servir un Parquet périmé).
+
+    Args:
+        chemin_json (str): Chemin d'accès au fichier JSON.
+
+    Returns:
+        pd.DataFrame: La table chargée.
+    """
+    chemin_parquet = os.path.splitext(chemin_json)[0] + ".parquet"
+    parquet_a_jour = os.path.exists(chemin_parquet) and (
+        not os.path.exists(chemin_json) or os.path.getmtime(chemin_parquet) >= os.path.getmtime(chemin_json)
+    )
+    if parquet_a_jour:
+        df = pd.read_parquet(chemin_parquet)
+        print(f"✅ Chargement réussi : {chemin_parquet}")
+        return df
+
+    if not os.path.exists(chemin_json):
+        raise FileNotFoundError(f"Fichier non trouvé : {chemin_json}")
+    if os.path.exists(chemin_parquet):
+        print(f"⚠️ {chemin_parquet} plus ancien que {chemin_json} : lecture du JSON.")
+
+    with open(chemin_json, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+        print(f"✅ Chargement réussi : {chemin_json}")
+
+    df = pd.DataFrame.from_dict(data, orient="index")
+    df.index.name = "code_insee"
+    return df.reset_index()
+
+
+def lire_geometrie_departements(chemin_geometrie, chemin_geojson):
+    """
+    Charge les polygones des départements en WGS84, déjà simplifiés.
+    Le fichier GeoParquet produit par geometrie_departements.py (une colonne géométrique
+    par niveau de détail) est utilisé en priorité ;
+    le GeoJSON brut n'est lu (puis reprojeté et simplifié) que s'il est absent.
+
+    Args:
+        chemin_geometrie (str): Chemin du GeoParquet des départements simplifiés.
+        chemin_geojson (str): Chemin du GeoJSON brut des départements (secours).
+
+    Returns:
+        gpd.GeoDataFrame: Les géométries des départements.
+    """
+    if os.path.exists(chemin_geometrie):
+        gdf = gpd.read_parquet(chemin_geometrie)
+        print(f"✅ Chargement réussi : {chemin_geometrie}")
+        return gdf
+
+    print(f"⚠️ {chemin_geometrie} absent, lecture du GeoJSON brut (lancer geometrie_departements.py).")
+    gdf = gpd.read_file(chemin_geojson)
+    print(f"✅ Chargement réussi : {chemin_geojson}")
+
+    gdf = gdf.to_crs(epsg=4326)
+    gdf["geometry"] = gdf["geometry"].simplify(tolerance=0.02, preserve_topology=True)
+    return gdf
+
+
+@st.cache_resource
+def load_data(chemin_communes, chemin_departements, chemin_geometrie, chemin_geojson):
     """
-    Charge les données des fichiers JSON spécifiés et les retourne sous forme de dictionnaires.
+    Charge les données des communes et des départements (Parquet si disponible, sinon JSON).
+    Les tables (géométrie comprise) sont chargées une fois par processus et partagées
+    entre les sessions : elles ne doivent pas être modifiées.
 
     Args:
         chemin_communes (str): Chemin d'accès au fichier JSON des données par commune.
         chemin_departements (str): Chemin d'accès au fichier JSON des données par département.
+        chemin_geometrie (str): Chemin du GeoParquet des départements simplifiés.
+        chemin_geojson (str): Chemin du GeoJSON brut des départements (utilisé seulement en secours).
 
     Returns:
         tuple: Un tuple contenant (data_communes, data_departements).
@@ -21,54 +92,26 @@ def load_data(chemin_communes, chemin_departements, chemin_geojson):
 
     # Charger les données des communes
     try:
-        if not os.path.exists(chemin_communes):
-            raise FileNotFoundError(f"Fichier non trouvé : {chemin_communes}")
-            
-        with open(chemin_communes, 'r', encoding='utf-8') as f:
-            data_communes = json.load(f)
-            print(f"✅ Chargement réussi : {chemin_communes}")
-
-        rows = []
-        for code_commune, attrs in data_communes.items():
-            row = {"code_insee": code_commune}  
-            row.update(attrs)              
-            rows.append(row)
-
-        data_communes = pd.DataFrame(rows)
+        data_communes = lire_table(chemin_communes)
 
     except Exception as e:
         print(f"❌ Erreur lors du chargement de {chemin_communes} : {e}")
 
     # Charger les données des départements
     try:
-        if not os.path.exists(chemin_departements):
-            raise FileNotFoundError(f"Fichier non trouvé : {chemin_departements}")
-            
-        with open(chemin_departements, 'r', encoding='utf-8') as f:
-            data_departements = json.load(f)
-            print(f"✅ Chargement réussi : {chemin_departements}")
-
-        rows = []
-        for code_dep, attrs in data_departements.items():
-            row = {"code_insee": code_dep}  
-            row.update(attrs)          
-            rows.append(row)
-
-        df_dep = pd.DataFrame(rows)
+        df_dep = lire_table(chemin_departements)
         print(f"✅ Conversion en DataFrame réussie pour les départements.")
 
-        gdf = gpd.read_file(chemin_geojson)
-        print(f"✅ Chargement réussi : {chemin_geojson}")
-        
+        gdf = lire_geometrie_departements(chemin_geometrie, chemin_geojson)
+
         # Harmoniser les types des codes
         gdf["code_insee"] = gdf["code_insee"].astype(str).str.zfill(2)
         df_dep["code_insee"] = df_dep["code_insee"].astype(str).str.zfill(2)
 
-        gdf = gdf.to_crs(epsg=4326)
-
         data_departements = gdf.merge(df_dep, on="code_insee", how="left")
         colonnes_json = df_dep.columns.tolist()  # ['code_insee', 'population_totale', ...]
-        colonnes_a_garder = ["geometry"] + colonnes_json
+        # Seul le niveau national est affiché (les niveaux plus fins servent aux tuiles vectorielles)
+        colonnes_a_garder = [GEOMETRIE_AFFICHEE["France"]] + colonnes_json
         data_departements = data_departements[colonnes_a_garder]
 
         print(f"✅ Jointure GeoDataFrame réussie pour les départements.")
@@ -79,3 +122,75 @@ def load_data(chemin_communes, chemin_departements, chemin_geojson):
         print(f"❌ Erreur lors du chargement de {chemin_departements} : {e}")
         
     return data_communes, data_departements
+
+
+@st.cache_data
+def load_index_partitions(dossier=DOSSIER_COMMUNES_DEPARTEMENTS):
+    """
+    Charge l'index des partitions de communes produit par partition_communes.py.
+
+    Returns:
+        dict: {code_dep: {fichier, nb_communes, bbox, centroide}} ou {} si absent.
+    """
+    chemin_index = os.path.join(dossier, "index.json")
+    if not os.path.exists(chemin_index):
+        return {}
+
+    with open(chemin_index, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def lire_geometrie_communes(code_dep, dossier=DOSSIER_GEOMETRIE_COMMUNES):
+    """
+    Charge les polygones des communes d'un département au niveau de détail affiché,
+    produits par geometrie_communes.py.
+
+    Args:
+        code_dep (str): Code du département (ex: '01', '2A').
+        dossier (str): Dossier des GeoParquet par département.
+
+    Returns:
+        gpd.GeoDataFrame | None: Les polygones (code_insee + niveau affiché), ou None si absents.
+    """
+    chemin = os.path.join(dossier, f"{code_dep}.parquet")
+    if not os.path.exists(chemin):
+        return None
+    # Seul le niveau régional est affiché (le niveau départemental sert aux tuiles vectorielles)
+    return gpd.read_parquet(chemin, columns=["code_insee", GEOMETRIE_AFFICHEE["Département"]])
+
+
+@lru_cache(maxsize=TAILLE_CACHE_DEPARTEMENTS)
+def load_communes_departement(code_dep, dossier=DOSSIER_COMMUNES_DEPARTEMENTS):
+    """
+    Charge uniquement les communes d'un département depuis sa partition Parquet,
+    avec leurs polygones s'ils ont été extraits par geometrie_communes.py.
+    Les derniers départements consultés restent en mémoire (cache LRU).
+    Le DataFrame retourné est partagé entre les appels : il ne doit pas être modifié.
+    La bbox et le centroïde de la partition sont disponibles dans df.attrs.
+
+    Args:
+        code_dep (str): Code du département (ex: '01', '2A').
+
+    Returns:
+        pd.DataFrame | None: Les communes du département (GeoDataFrame si les polygones existent),
+        ou None si la partition est absente.
+    """
+    infos = load_index_partitions(dossier).get(code_dep)
+    if infos is None:
+        return None
+
+    df = pd.read_parquet(os.path.join(dossier, infos["fichier"]))
+
+    # Polygones des communes, chargés seulement pour le département demandé
+    geometrie = lire_geometrie_communes(code_dep)
+    if geometrie is not None:
+        df = gpd.GeoDataFrame(
+            df.merge(geometrie, on="code_insee", how="left"),
+            geometry=geometrie.geometry.name,
+            crs=geometrie.crs,
+        )
+
+    df.attrs["bbox"] = infos.get("bbox")
+    df.attrs["centroide"] = infos.get("centroide")
+    print(f"✅ Chargement de la partition du département {code_dep} ({len(df)} communes)")
+    return df
@@ -0,0 +1,90 @@
+import hashlib
+
+import numpy as np
+import shapely
+
+from src.cache import LRUCache
+from src.variables import PRECISION_COORDONNEES, TAILLE_CACHE_GEOMETRIES
+
+# ===========================
+# Géométries compactes pour PyDeck
+# ===========================
+
+# Géométries déjà empaquetées, indexées par l'empreinte de leur WKB
+_cache_geometries = LRUCache(maxsize=TAILLE_CACHE_GEOMETRIES)
+
+
+def geometry_fingerprint(geometries, precision=PRECISION_COORDONNEES):
+    """Empreinte d'une série de géométries (contenu WKB et précision demandée)."""
+    wkb = shapely.to_wkb(np.asarray(geometries, dtype=object))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(precision).encode())
+    for octets in wkb:
+        h.update(octets if octets is not None else b"\x00")
+    return h.hexdigest()
+
+
+def pack_polygons(geometries, precision=PRECISION_COORDONNEES):
+    """
+    Empaquette des (Multi)Polygones en anneaux de coordonnées arrondies,
+    au format attendu par la PolygonLayer de deck.gl.
+
+    Chaque partie d'un MultiPolygone devient un enregistrement à part ;
+    `unite` donne, pour chaque partie, la position de l'unité (ligne) d'origine.
+    Le résultat est mis en cache : la géométrie n'est découpée qu'une seule fois
+    quelles que soient les valeurs affichées ensuite.
+
+    Args:
+        geometries (GeoSeries | array-like): Les géométries en WGS84.
+        precision (int): Nombre de décimales conservées (4 ≈ 10 m).
+
+    Returns:
+        dict: {"rings": [[[[lon, lat], ...], ...], ...], "unite": np.ndarray[int]}
+    """
+    cle = geometry_fingerprint(geometries, precision)
+    packed = _cache_geometries.get(cle)
+    if packed is not None:
+        return packed
+
+    geoms = np.asarray(geometries, dtype=object)
+    valides = np.array([g is not None and not g.is_empty for g in geoms], dtype=bool)
+    positions = np.flatnonzero(valides)
+
+    if positions.size == 0:
+        packed = {"rings": [], "unite": np.empty(0, dtype=np.int64)}
+        _cache_geometries.put(cle, packed)
+        return packed
+
+    # Tableaux plats : coordonnées + offsets (anneaux -> polygones -> unités)
+    _, coords, offsets = shapely.to_ragged_array(geoms[positions])
+    coords = np.round(coords[:, :2], precision)
+    if len(offsets) == 2:
+        # Uniquement des Polygones : une partie par unité
+        ring_offsets, polygon_offsets = offsets
+        unit_offsets = np.arange(len(polygon_offsets))
+    else:
+        ring_offsets, polygon_offsets, unit_offsets = offsets
+
+    rings = []
+    for p in range(len(polygon_offsets) - 1):
+        anneaux = ring_offsets[polygon_offsets[p]:polygon_offsets[p + 1] + 1]
+        rings.append([coords[debut:fin].tolist() for debut, fin in zip(anneaux[:-1], anneaux[1:])])
+
+    parts_par_unite = np.diff(unit_offsets)
+    packed = {"rings": rings, "unite": np.repeat(positions, parts_par_unite)}
+    _cache_geometries.put(cle, packed)
+    return packed
+
+
+def to_json_list(valeurs):
+    """Convertit un vecteur en liste JSON-compatible (NaN -> None, types NumPy -> types Python)."""
+    return [None if isinstance(v, float) and v != v else v for v in np.asarray(valeurs).tolist()]
+
+
+def to_records(champs, nb):
+    """
+    Transforme des colonnes {nom: vecteur} en liste d'enregistrements JSON-compatibles
+    (NaN -> None, types NumPy -> types Python).
+    """
+    colonnes = {nom: to_json_list(valeurs) for nom, valeurs in champs.items()}
+    return [{nom: colonnes[nom][i] for nom in colonnes} for i in range(nb)]
@@ -0,0 +1,88 @@
+import hashlib
+
+# ===========================
+# Graphe de calcul incrémental
+# ===========================
+
+def fingerprint(value):
+    """
+    Empreinte stable d'une valeur simple (str, nombres, None, listes, tuples, dicts).
+    Deux valeurs égales ont la même empreinte, quel que soit l'ordre des clés d'un dict.
+    """
+    def _normaliser(v):
+        if isinstance(v, dict):
+            return ("dict", tuple(sorted((repr(k), _normaliser(x)) for k, x in v.items())))
+        if isinstance(v, (list, tuple)):
+            return ("seq", tuple(_normaliser(x) for x in v))
+        if isinstance(v, float):
+            return ("float", float(v).hex())
+        return (type(v).__name__, repr(v))
+
+    return hashlib.blake2b(repr(_normaliser(value)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ComputationGraph:
+    """
+    Petit graphe de dépendances entre étapes de calcul.
+
+    Chaque nœud déclare les entrées (paramètres de l'interface) et les nœuds dont il dépend.
+    Son empreinte combine l'empreinte de ses entrées et celles de ses dépendances :
+    un nœud n'est recalculé que si cette empreinte a changé depuis le dernier calcul,
+    c'est-à-dire seulement en aval de ce qui a réellement bougé.
+    """
+
+    def __init__(self):
+        self._noeuds = {}
+        self._entrees = {}
+        self._cache = {}   # nom -> (empreinte, valeur)
+        self.stats = {}    # nom -> {"hits": int, "misses": int}
+
+    def add_node(self, name, fonction, inputs=(), deps=()):
+        """
+        Déclare un nœud.
+
+        Args:
+            name (str): Nom du nœud.
+            fonction (callable): Appelée avec les valeurs des dépendances puis des entrées
+                (arguments nommés), retourne la valeur du nœud.
+            inputs (tuple): Noms des entrées lues par le nœud.
+            deps (tuple): Noms des nœuds dont il dépend (déclarés avant lui).
+        """
+        for dep in deps:
+            if dep not in self._noeuds:
+                raise ValueError(f"Dépendance inconnue '{dep}' pour le nœud '{name}'")
+        self._noeuds[name] = (fonction, tuple(inputs), tuple(deps))
+        self.stats[name] = {"hits": 0, "misses": 0}
+
+    def set_inputs(self, **valeurs):
+        """Met à jour les entrées du graphe (les nœuds concernés seront recalculés à la demande)."""
+        self._entrees.update(valeurs)
+
+    def _empreinte(self, name):
+        fonction, inputs, deps = self._noeuds[name]
+        valeurs = [self._entrees.get(nom) for nom in inputs]
+        return fingerprint([name, valeurs, [self._empreinte(dep) for dep in deps]])
+
+    def get(self, name):
+        """Retourne la valeur du nœud, recalculée uniquement si ses entrées ont changé."""
+        fonction, inputs, deps = self._noeuds[name]
+        empreinte = self._empreinte(name)
+
+        en_cache = self._cache.get(name)
+        if en_cache is not None and en_cache[0] == empreinte:
+            self.stats[name]["hits"] += 1
+            return en_cache[1]
+
+        self.stats[name]["misses"] += 1
+        arguments = {dep: self.get(dep) for dep in deps}
+        arguments.update({nom: self._entrees.get(nom) for nom in inputs})
+        valeur = fonction(**arguments)
+        self._cache[name] = (empreinte, valeur)
+        return valeur
+
+    def invalidate(self, name=None):
+        """Oublie la valeur d'un nœud (ou de tous les nœuds)."""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# ===========================
+# Lissage bayésien empirique des indicateurs communaux
+# ===========================
+
+def lissage_bayesien(valeurs, population, groupes, echelle=100.0):
+    """
+    Rapproche le taux de chaque commune de la moyenne de son groupe (département),
+    d'autant plus que la commune est peu peuplée (estimateur de Marshall, variance binomiale).
+
+    Pour un groupe g : m = moyenne des taux pondérée par la population,
+    s² = variance pondérée des taux, A = max(s² - m(1 - m) / n̄, 0) la variance « vraie » entre communes.
+    Taux lissé : m + C (p - m), avec C = A / (A + m(1 - m) / N) où N est la population de la commune.
+
+    Les communes sans valeur restent NaN ; celles sans population connue gardent leur valeur.
+
+    Args:
+        valeurs (array-like): Taux des communes (en %, voir echelle).
+        population (array-like): Population de chaque commune.
+        groupes (array-like): Indice entier (0, 1, ...) du groupe de chaque commune (voir pd.factorize).
+        echelle (float): 100 pour des valeurs en %, 1 pour des proportions.
+
+    Returns:
+        np.ndarray: Taux lissés, même échelle, arrondis à 2 décimales.
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    population = np.asarray(population, dtype=np.float64)
+    groupe = np.asarray(groupes, dtype=np.int64)
+    nb_groupes = groupe.max() + 1 if len(groupe) else 0
+
+    p = valeurs / echelle
+    utiles = np.isfinite(p) & np.isfinite(population) & (population > 0)
+    g, w, pu = groupe[utiles], population[utiles], p[utiles]
+
+    # Agrégats par groupe en quelques np.bincount
+    somme_w = np.bincount(g, weights=w, minlength=nb_groupes)
+    nb = np.bincount(g, minlength=nb_groupes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = np.bincount(g, weights=w * pu, minlength=nb_groupes) / somme_w
+        s2 = np.bincount(g, weights=w * (pu - m[g]) ** 2, minlength=nb_groupes) / somme_w
+        n_moyen = somme_w / nb
+        A = np.maximum(s2 - m * (1 - m) / n_moyen, 0.0)
+
+        # Poids de la valeur observée : 1 pour une grande commune, proche de 0 pour un hameau
+        bruit = m[g] * (1 - m[g]) / w
+        C = np.where(A[g] + bruit > 0, A[g] / (A[g] + bruit), 1.0)
+
+    lisse = p.copy()
+    lisse[utiles] = m[g] + C * (pu - m[g])
+    return np.round(lisse * echelle, 2)
+
+
+def lisser_communes(df, colonnes, population="population_totale"):
+    """
+    Applique le lissage bayésien aux colonnes de taux d'une table de communes,
+    par département (deux premiers caractères du code INSEE).
+
+    Args:
+        df (pd.DataFrame): Les communes (non modifiée).
+        colonnes (list): Colonnes de taux (en %) à lisser ; absentes ignorées.
+        population (str): Colonne de population.
+
+    Returns:
+        pd.DataFrame: Copie de la table dont les colonnes de taux sont remplacées par leurs valeurs lissées.
+    """
+    colonnes = [col for col in colonnes if col in df.columns]
+    if not colonnes or population not in df.columns or "code_insee" not in df.columns:
+        return df
+
+    groupes, _ = pd.factorize(df["code_insee"].astype(str).str[:2])
+    poids = df[population].astype(float).to_numpy()
+    lissees = {
+        col: lissage_bayesien(df[col].astype(float).to_numpy(), poids, groupes)
+        for col in colonnes
+    }
+    return df.assign(**lissees)
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# ===========================
+# Classements : top K et rangs nationaux
+# ===========================
+
+def top_k(scores, k):
+    """
+    Positions des k scores les plus élevés, du plus élevé au moins élevé.
+    Seuls ces k éléments sont triés (sélection par np.argpartition) ; les NaN sont ignorés.
+
+    Args:
+        scores (array-like): Un score par unité.
+        k (int): Nombre d'unités retenues.
+
+    Returns:
+        np.ndarray: Positions (entiers) dans scores, au plus k.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    valides = np.flatnonzero(~np.isnan(scores))
+    k = min(k, len(valides))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    candidats = valides
+    if k < len(valides):
+        candidats = valides[np.argpartition(-scores[valides], k - 1)[:k]]
+
+    # Tri stable des k retenus : à score égal, l'ordre d'origine est conservé
+    return candidats[np.argsort(-scores[candidats], kind="stable")]
+
+
+def rangs(scores):
+    """
+    Rang de chaque score dans son vecteur (1 = score le plus élevé), sur le dernier axe :
+    un tableau (S, n) donne les rangs des n unités pour chacun des S scénarios.
+    Les ex æquo partagent le meilleur rang ; NaN -> rang NaN.
+
+    Args:
+        scores (array-like): Tableau (n,) ou (S, n).
+
+    Returns:
+        np.ndarray: Rangs (float64, NaN pour les scores manquants), de même forme que scores.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    vecteur = scores.ndim == 1
+    scores = np.atleast_2d(scores)
+    nb_lignes, n = scores.shape
+
+    # Tri décroissant de chaque ligne (les NaN restent en fin de ligne)
+    ordre = np.argsort(-scores, axis=1, kind="stable")
+    tries = np.take_along_axis(scores, ordre, axis=1)
+
+    # Rang d'un score = position (1 + ...) de la première occurrence de sa valeur dans le tri
+    debut_groupe = np.ones((nb_lignes, n), dtype=bool)
+    debut_groupe[:, 1:] = tries[:, 1:] != tries[:, :-1]
+    positions = np.where(debut_groupe, np.arange(n), 0)
+    rang_tries = np.maximum.accumulate(positions, axis=1) + 1.0
+    rang_tries[np.isnan(tries)] = np.nan
+
+    resultat = np.empty_like(rang_tries)
+    np.put_along_axis(resultat, ordre, rang_tries, axis=1)
+    return resultat[0] if vecteur else resultat
+
+
+def departement_commune(codes_insee):
+    """Code du département d'une commune (deux premiers caractères du code INSEE, ex: '2A')."""
+    return pd.Series(codes_insee, dtype=str).str[:2].to_numpy()
+
+
+class ClassementNational:
+    """
+    Index de classement de toutes les communes de France pour un vecteur de scores.
+
+    Les scores valides sont triés une seule fois (au niveau national et par département) ;
+    le rang ou le percentile de n'importe quel score s'obtient ensuite par np.searchsorted,
+    en O(log n), y compris pour des communes hors du vecteur d'origine.
+    Rang 1 = score le plus élevé (le plus vulnérable) ; les ex æquo partagent le meilleur rang.
+    """
+
+    def __init__(self, scores, codes_insee):
+        """
+        Args:
+            scores (array-like): Score de chaque commune (NaN -> commune non classée).
+            codes_insee (array-like): Code INSEE de chaque commune, dans le même ordre.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        departements = departement_commune(codes_insee)
+
+        valides = ~np.isnan(scores)
+        self.tries = np.sort(scores[valides])
+        self.n = len(self.tries)
+
+        # Un seul tri (département, score) puis découpage en tranches contiguës
+        deps, scores_valides = departements[valides], scores[valides]
+        ordre = np.lexsort((scores_valides, deps))
+        deps, scores_valides = deps[ordre], scores_valides[ordre]
+        codes, debuts = np.unique(deps, return_index=True)
+        fins = np.r_[debuts[1:], len(deps)]
+        self.par_departement = {
+            code: scores_valides[debut:fin] for code, debut, fin in zip(codes, debuts, fins)
+        }
+
+    @staticmethod
+    def _rang(tries, scores):
+        """Rang de chaque score dans un tableau trié : 1 + nombre de scores strictement supérieurs."""
+        scores = np.asarray(scores, dtype=np.float64)
+        rang = (len(tries) - np.searchsorted(tries, scores, side="right") + 1).astype(np.float64)
+        rang[np.isnan(scores)] = np.nan
+        return rang
+
+    def rang_national(self, scores):
+        """Rang national (1 = plus vulnérable de France) de chaque score ; NaN si score manquant."""
+        return self._rang(self.tries, scores)
+
+    def percentile_national(self, scores):
+        """Part des communes de France (en %) dont le score est inférieur ou égal à chaque score."""
+        scores = np.asarray(scores, dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(scores), np.nan)
+        percentile = np.round(np.searchsorted(self.tries, scores, side="right") / self.n * 100, 1)
+        percentile[np.isnan(scores)] = np.nan
+        return percentile
+
+    def rang_departemental(self, scores, codes_insee):
+        """Rang de chaque score parmi les communes de son département ; NaN si inconnu."""
+        scores = np.asarray(scores, dtype=np.float64)
+        departements = departement_commune(codes_insee)
+        rang = np.full(len(scores), np.nan)
+        for code in np.unique(departements):
+            tries = self.par_departement.get(code)
+            if tries is None:
+                continue
+            masque = departements == code
+            rang[masque] = self._rang(tries, scores[masque])
+        return rang
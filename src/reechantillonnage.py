@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from src.ranking import rangs
+from src.registry import get_registry
+from src.utils import load_sante_variables
+from src.variables import BUDGET_MEMOIRE
+
+# ===========================
+# Intervalles de confiance des rangs (bootstrap paramétrique)
+# ===========================
+
+def _effectifs(df):
+    """Population de chaque unité (effectif des tirages binomiaux) ; 0 si inconnue."""
+    if "population_totale" not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    population = df["population_totale"].astype(float).to_numpy()
+    return np.where(np.isfinite(population) & (population > 0), np.round(population), 0).astype(np.int64)
+
+
+def intervalles_rangs(engine, df, selected_vars, weights, access_col, alpha, nb_replications=200,
+                      niveau=0.9, budget=BUDGET_MEMOIRE, graine=0):
+    """
+    Intervalles de confiance du rang de chaque unité pour le score de double vulnérabilité.
+
+    Les indicateurs exprimés en % (taux de pauvreté, part des familles monoparentales, ...)
+    sont rééchantillonnés : valeur / 100 = proportion p observée sur N = population_totale habitants,
+    d'où p* = Binomiale(N, p) / N. Une commune de 50 habitants a donc un indicateur (et un rang)
+    beaucoup plus incertain qu'une ville. La population sert d'effectif approché, y compris pour
+    les parts calculées sur les ménages ou les familles. Les autres indicateurs, l'accès aux soins
+    et les unités sans population connue restent fixes.
+
+    Les réplications sont tirées par lots dont les tableaux temporaires tiennent dans `budget` ;
+    seuls les rangs sont conservés (entiers 32 bits, nb_replications × n).
+
+    Args:
+        engine (ScoringEngine): Moteur construit sur df.
+        df (pd.DataFrame): Les unités (avec population_totale et les colonnes brutes).
+        selected_vars (list), weights (dict): Critères socio et leurs poids, comme dans l'application.
+        access_col (str): Colonne APL (ou libellé de profession) du score d'accès.
+        alpha (float): Poids du score socio dans le score double.
+        nb_replications (int): Nombre de réplications.
+        niveau (float): Niveau de confiance de l'intervalle (0.9 -> quantiles 5 % et 95 %).
+        budget (int): Mémoire (octets) allouée aux tableaux temporaires d'un lot.
+        graine (int): Graine du générateur.
+
+    Returns:
+        pd.DataFrame: Aligné sur df, colonnes rang, rang_ic_bas, rang_ic_haut (NaN si score manquant).
+    """
+    resultat = pd.DataFrame(index=df.index, columns=["rang", "rang_ic_bas", "rang_ic_haut"], dtype=float)
+    observe = engine.score_double(engine.score_socio(selected_vars, weights),
+                                  engine.score_acces(load_sante_variables().get(access_col, access_col)), alpha)
+    resultat["rang"] = rangs(observe)
+    if not selected_vars or np.isnan(observe).all():
+        return resultat
+
+    # Variables retenues (ordre et poids normalisés identiques à ScoringEngine.score_socio)
+    total_weight = sum(weights[v] for v in selected_vars if v in weights)
+    if total_weight <= 0:
+        return resultat
+    taux = set(get_registry().colonnes_taux(engine.scope))
+    termes = []
+    for var_label in selected_vars:
+        col = engine.socio_vars.get(var_label)
+        if var_label not in weights or col not in engine.positions:
+            continue
+        termes.append((col, weights[var_label] / total_weight, col in taux))
+
+    acces = engine.score_acces(load_sante_variables().get(access_col, access_col))
+    effectifs = _effectifs(df)
+    rng = np.random.default_rng(graine)
+
+    # Valeurs et proportions observées des indicateurs rééchantillonnés
+    brutes, proportions = {}, {}
+    for col, _, est_taux in termes:
+        if est_taux:
+            brutes[col] = df[col].astype(float).to_numpy()
+            proportions[col] = np.clip(np.nan_to_num(brutes[col] / 100, nan=0.0), 0.0, 1.0)
+
+    n = engine.n
+    lot = max(1, int(budget // ((len(proportions) + 4) * 8 * max(n, 1))))
+    rangs_replications = np.empty((nb_replications, n), dtype=np.int32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for debut in range(0, nb_replications, lot):
+            fin = min(debut + lot, nb_replications)
+            socio = np.zeros((fin - debut, n))
+            for col, w, est_taux in termes:
+                if est_taux:
+                    tirage = rng.binomial(effectifs, proportions[col], size=(fin - debut, n)) / effectifs * 100
+                    brut = np.where((effectifs > 0) & ~np.isnan(brutes[col]), tirage, brutes[col])
+                    colonne = engine.normaliser_socio(col, brut)
+                else:
+                    colonne = engine.norm_socio[:, engine.positions[col]]
+                socio = socio + w * colonne
+            socio = np.round(socio * 100, 2)
+            double = np.round(alpha * socio + (1 - alpha) * acces, 2)
+            r = rangs(double)
+            rangs_replications[debut:fin] = np.nan_to_num(r, nan=0).astype(np.int32)
+
+    # Quantiles des rangs (les unités sans score n'ont pas d'intervalle)
+    queue = (1 - niveau) / 2
+    bas, haut = np.quantile(rangs_replications, [queue, 1 - queue], axis=0, method="inverted_cdf")
+    valides = ~np.isnan(observe)
+    resultat.loc[valides, "rang_ic_bas"] = bas[valides]
+    resultat.loc[valides, "rang_ic_haut"] = haut[valides]
+
+    print(f"✅ Intervalles de confiance des rangs : {nb_replications} réplications sur {n} unités")
+    return resultat
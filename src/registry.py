@@ -0,0 +1,126 @@
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from src.variables import CHEMIN_VARIABLES_COMMUNES, CHEMIN_VARIABLES_DEPARTEMENTS
+
+# ===========================
+# Registre des métadonnées des variables
+# ===========================
+
+# Périmètres connus, dans l'ordre de priorité des libellés (communes d'abord)
+SCOPES = {
+    "communes": CHEMIN_VARIABLES_COMMUNES,
+    "departements": CHEMIN_VARIABLES_DEPARTEMENTS,
+}
+
+
+def scope_from_mode(scope_mode):
+    """Traduit le mode de l'application ("France" / "Département") en périmètre du registre."""
+    return "departements" if scope_mode == "France" else "communes"
+
+
+class VariableRegistry:
+    """
+    Métadonnées de toutes les variables (variable_communes.json et variable_departements.json),
+    chargées une seule fois et indexées par libellé, nom de colonne, type et périmètre.
+    Le registre est en lecture seule : les infos retournées ne doivent pas être modifiées.
+    """
+
+    def __init__(self, dicos):
+        """
+        Args:
+            dicos (dict): {scope: {nom_humain: infos}} au format des fichiers variable_*.json.
+        """
+        self._dicos = MappingProxyType({
+            scope: MappingProxyType({label: MappingProxyType(dict(infos)) for label, infos in dico.items()})
+            for scope, dico in dicos.items()
+        })
+
+        # Index (scope, nom_col, type) -> infos
+        self._par_colonne = {}
+        # Index type -> {nom_humain: nom_colonne}, toutes échelles confondues
+        self._par_type = {}
+        # {nom_humain: nom_colonne}, toutes échelles et tous types confondus
+        self._colonnes = {}
+
+        for scope, dico in self._dicos.items():
+            for label, infos in dico.items():
+                self._par_colonne[(scope, infos.get("nom_col"), infos.get("type"))] = infos
+                self._par_type.setdefault(infos.get("type"), {}).setdefault(label, infos.get("nom_col"))
+                self._colonnes.setdefault(label, infos.get("nom_col"))
+
+    @classmethod
+    def from_files(cls, fichiers=None):
+        """Charge le registre depuis les fichiers JSON {scope: chemin} (absents ignorés)."""
+        dicos = {}
+        for scope, chemin in (fichiers or SCOPES).items():
+            dicos[scope] = {}
+            if os.path.exists(chemin):
+                with open(chemin, 'r', encoding='utf-8') as f:
+                    dicos[scope] = json.load(f)
+
+        print("\n ✅ Variables chargées depuis les fichiers :", ", ".join((fichiers or SCOPES).values()))
+        return cls(dicos)
+
+    def variables(self, type_data=None):
+        """
+        Retourne {nom_humain: nom_colonne} pour toutes les variables,
+        ou seulement celles d'un type ("socio" / "sante").
+        """
+        if type_data is None:
+            return dict(self._colonnes)
+        return dict(self._par_type.get(type_data, {}))
+
+    def dico(self, scope):
+        """Retourne les métadonnées d'un périmètre sous la même forme que le json."""
+        return self._dicos.get(scope, MappingProxyType({}))
+
+    def info(self, scope, col_name, type_data):
+        """Retourne les infos d'une variable à partir de (périmètre, colonne, type), ou None."""
+        return self._par_colonne.get((scope, col_name, type_data))
+
+    def info_label(self, scope, label):
+        """Retourne les infos d'une variable à partir de son libellé, ou None."""
+        return self._dicos.get(scope, {}).get(label)
+
+    def colonnes_taux(self, scope):
+        """
+        Colonnes socio exprimées en pourcentage de la population ("En %") d'un périmètre :
+        ce sont des proportions, dont le bruit d'échantillonnage dépend de la population de l'unité.
+        """
+        return [
+            infos.get("nom_col") for infos in self.dico(scope).values()
+            if infos.get("type") == "socio" and infos.get("unit") == "En %"
+        ]
+
+    def normalisation(self, scope, colonnes):
+        """
+        Vecteurs de normalisation pour une liste de colonnes [(nom_col, type), ...] :
+        (min, max, order). min/max valent NaN si la variable n'a pas de bornes connues,
+        order vaut True par défaut.
+        """
+        col_min = np.full(len(colonnes), np.nan)
+        col_max = np.full(len(colonnes), np.nan)
+        order = np.ones(len(colonnes), dtype=bool)
+
+        for j, (col_name, type_data) in enumerate(colonnes):
+            infos = self.info(scope, col_name, type_data)
+            if infos is None:
+                continue
+            if "min" in infos and "max" in infos:
+                col_min[j] = infos["min"]
+                col_max[j] = infos["max"]
+            if "order" in infos:
+                order[j] = infos["order"]
+
+        return col_min, col_max, order
+
+
+@lru_cache(maxsize=1)
+def get_registry():
+    """Retourne le registre des variables, chargé une seule fois par processus."""
+    return VariableRegistry.from_files()
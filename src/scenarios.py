@@ -0,0 +1,149 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.utils import load_sante_variables
+from src.variables import BUDGET_MEMOIRE
+
+# ===========================
+# Calcul des scores pour des lots de scénarios
+# ===========================
+
+# Ordre des scores sur le dernier axe du tableau de résultats
+SCORES = ("score_socio", "score_acces", "score_double")
+
+
+def grille_scenarios(poids_possibles, alphas, professions):
+    """
+    Produit cartésien de valeurs de poids, d'alpha et de professions.
+
+    Args:
+        poids_possibles (dict): {label_socio: [poids possibles]}.
+        alphas (list): Valeurs d'alpha.
+        professions (list): Professions de santé (libellés ou colonnes APL).
+
+    Returns:
+        tuple: (poids: pd.DataFrame (S, nb_variables), alphas: np.ndarray (S,), professions: list (S))
+    """
+    labels = list(poids_possibles)
+    combinaisons = list(itertools.product(*(poids_possibles[label] for label in labels), alphas, professions))
+    poids = pd.DataFrame([c[:len(labels)] for c in combinaisons], columns=labels, dtype=float)
+    return poids, np.array([c[-2] for c in combinaisons], dtype=float), [c[-1] for c in combinaisons]
+
+
+def _colonne_profession(profession):
+    """Accepte un libellé de profession ("Dentistes") ou directement la colonne APL."""
+    return load_sante_variables().get(profession, profession)
+
+
+def _taille_lot(n, budget, nb_tableaux=4):
+    """Nombre de scénarios traités ensemble pour que les tableaux temporaires (lot, n) tiennent dans le budget."""
+    return max(1, int(budget // (nb_tableaux * 8 * max(n, 1))))
+
+
+def score_scenarios(engine, poids, alphas, professions, dtype=np.float32, budget=BUDGET_MEMOIRE):
+    """
+    Calcule score_socio, score_acces et score_double de toutes les unités
+    pour S scénarios (poids, alpha, profession) en une passe vectorisée.
+
+    Les règles sont celles de ScoringEngine : poids normalisés par leur somme,
+    NaN si une variable retenue est manquante, score_double = alpha * socio + (1 - alpha) * accès,
+    arrondis à 2 décimales. Un poids nul (ou NaN) signifie que la variable n'est pas retenue.
+    Les variables sont accumulées dans l'ordre des colonnes de `poids` : les scores sont
+    identiques à ceux de l'application quand les critères y sont ajoutés dans le même ordre.
+
+    Args:
+        engine (ScoringEngine): Moteur construit sur les unités à classer.
+        poids (pd.DataFrame): Une ligne par scénario, une colonne par libellé socio.
+        alphas (array-like): Un alpha par scénario (ou un seul pour tous).
+        professions (list | str): Une profession par scénario (ou une seule pour tous).
+        dtype: Type des scores en sortie (float32 par défaut : tableau deux fois plus compact).
+        budget (int): Mémoire (octets) allouée aux tableaux temporaires d'un lot de scénarios.
+
+    Returns:
+        np.ndarray: Tableau (S, n, 3) ; dernier axe dans l'ordre de SCORES.
+    """
+    resultat = _calculer_scenarios(engine, poids, alphas, professions, dtype, budget)
+    print(f"✅ {len(poids)} scénarios calculés sur {engine.n} unités")
+    return resultat
+
+
+def _calculer_scenarios(engine, poids, alphas, professions, dtype=np.float32, budget=BUDGET_MEMOIRE):
+    """Calcul de score_scenarios, sans journalisation (utilisé aussi par les workers de sensibilite.py)."""
+    nb_scenarios = len(poids)
+    alphas = np.broadcast_to(np.asarray(alphas, dtype=np.float64), (nb_scenarios,))
+    if isinstance(professions, str):
+        professions = [professions] * nb_scenarios
+    if len(professions) != nb_scenarios:
+        raise ValueError(f"{len(professions)} professions pour {nb_scenarios} scénarios")
+
+    # Poids normalisés par scénario, restreints aux variables présentes dans le moteur
+    W = np.nan_to_num(poids.to_numpy(dtype=np.float64), nan=0.0)
+    W[W < 0] = 0.0
+    total = W.sum(axis=1)
+    colonnes = [engine.positions.get(engine.socio_vars.get(label)) for label in poids.columns]
+    presentes = [k for k, j in enumerate(colonnes) if j is not None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        W = W / total[:, None]
+    W[total <= 0] = 0.0
+
+    # Score d'accès : une fois par profession distincte
+    codes, inverse = np.unique([_colonne_profession(p) for p in professions], return_inverse=True)
+    acces = np.stack([engine.score_acces(col) for col in codes]) if len(codes) else np.empty((0, engine.n))
+
+    resultat = np.empty((nb_scenarios, engine.n, len(SCORES)), dtype=dtype)
+    lot = _taille_lot(engine.n, budget)
+    for debut in range(0, nb_scenarios, lot):
+        fin = min(debut + lot, nb_scenarios)
+        w = W[debut:fin]
+
+        # Accumulation variable par variable sur tout le lot (même ordre d'additions que le moteur)
+        socio = np.zeros((fin - debut, engine.n))
+        for k in presentes:
+            retenue = w[:, k] > 0
+            if not retenue.any():
+                continue
+            colonne = engine.norm_socio[:, colonnes[k]]
+            socio = socio + np.where(retenue[:, None], w[:, k, None] * colonne[None, :], 0.0)
+        socio = np.round(socio * 100, 2)
+        socio[total[debut:fin] <= 0] = np.nan
+
+        a = alphas[debut:fin, None]
+        acc = acces[inverse[debut:fin]]
+        resultat[debut:fin, :, 0] = socio
+        resultat[debut:fin, :, 1] = acc
+        resultat[debut:fin, :, 2] = np.round(a * socio + (1 - a) * acc, 2)
+
+    return resultat
+
+
+def scenarios_to_parquet(resultats, poids, alphas, professions, codes, chemin):
+    """
+    Écrit les résultats au format long dans un fichier Parquet :
+    une ligne par (scénario, unité), avec les paramètres du scénario.
+
+    Args:
+        resultats (np.ndarray): Tableau (S, n, 3) retourné par score_scenarios.
+        poids (pd.DataFrame): Les poids des scénarios (S lignes).
+        alphas, professions: Paramètres des scénarios, comme pour score_scenarios.
+        codes (array-like): Code INSEE des n unités.
+        chemin (str): Fichier Parquet de sortie.
+    """
+    nb_scenarios, n, _ = resultats.shape
+    parametres = poids.reset_index(drop=True).copy()
+    parametres["alpha"] = np.broadcast_to(np.asarray(alphas, dtype=np.float64), (nb_scenarios,))
+    parametres["profession"] = [professions] * nb_scenarios if isinstance(professions, str) else list(professions)
+
+    df = pd.DataFrame({
+        "scenario": np.repeat(np.arange(nb_scenarios), n),
+        "code_insee": np.tile(np.asarray(codes, dtype=str), nb_scenarios),
+    })
+    for i, nom in enumerate(SCORES):
+        df[nom] = resultats[:, :, i].reshape(-1)
+    # Paramètres répétés pour chaque unité (colonnes très bien compressées par Parquet)
+    for nom in parametres.columns:
+        df[nom] = np.repeat(parametres[nom].to_numpy(), n)
+
+    df.to_parquet(chemin, index=False)
+    print(f"✅ Fichier Parquet créé : {chemin} ({nb_scenarios} scénarios × {n} unités)")
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+# ===========================
+# Moteur de calcul des scores
+# ===========================
+
+class ScoringEngine:
+    """
+    Garde les indicateurs d'un périmètre (départements ou communes) sous forme
+    d'une matrice NumPy déjà normalisée, pour calculer les scores socio, accès
+    et double vulnérabilité de toutes les unités en quelques opérations vectorielles.
+
+    La normalisation reprend exactement les règles des fonctions compute_* :
+    - min / max issus des métadonnées de la variable, sinon calculés sur les données ;
+    - plage nulle ou inconnue -> valeur normalisée 0 ;
+    - order = False -> 1 - valeur normalisée (pour le score socio uniquement).
+    """
+
+    def __init__(self, df, registry, scope):
+        """
+        Args:
+            df (pd.DataFrame): Les unités du périmètre (une ligne par unité).
+            registry (VariableRegistry): Registre des métadonnées des variables.
+            scope (str): Périmètre des métadonnées ("communes" ou "departements").
+        """
+        self.index = df.index
+        self.n = len(df)
+        self.socio_vars = registry.variables("socio")
+
+        colonnes = [(col, "socio") for col in self.socio_vars.values()]
+        colonnes += [(col, "sante") for col in registry.variables("sante").values()]
+        colonnes = [(col, type_data) for col, type_data in dict.fromkeys(colonnes) if col in df.columns]
+
+        self.scope = scope
+        self.colonnes = [col for col, _ in colonnes]
+        self.positions = {col: j for j, col in enumerate(self.colonnes)}
+
+        X = np.empty((self.n, len(colonnes)), dtype=np.float64)
+        for j, col in enumerate(self.colonnes):
+            X[:, j] = df[col].astype(float).to_numpy()
+
+        # Bornes des métadonnées, sinon calculées sur les données
+        self.min, self.max, self.order = registry.normalisation(scope, colonnes)
+        for j in np.flatnonzero(np.isnan(self.min) | np.isnan(self.max)):
+            if np.isfinite(X[:, j]).any():
+                self.min[j] = np.nanmin(X[:, j])
+                self.max[j] = np.nanmax(X[:, j])
+
+        # Matrice normalisée (sans inversion) : sert au score d'accès
+        plage_valide = ~np.isnan(self.min) & ~np.isnan(self.max) & (self.max != self.min)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            norm = (X - self.min) / (self.max - self.min)
+        norm[:, ~plage_valide] = 0.0
+        self.norm = norm
+
+        # Matrice orientée "plus haut = plus vulnérable" : sert au score socio
+        self.norm_socio = np.where(self.order, norm, 1 - norm)
+
+    def normaliser_socio(self, col, valeurs):
+        """
+        Normalise des valeurs brutes d'une colonne socio avec les bornes et l'orientation du moteur
+        (mêmes règles que norm_socio), par exemple pour des valeurs rééchantillonnées.
+
+        Args:
+            col (str): Nom de la colonne.
+            valeurs (np.ndarray): Valeurs brutes, de forme quelconque.
+
+        Returns:
+            np.ndarray: Valeurs normalisées orientées "plus haut = plus vulnérable".
+        """
+        j = self.positions[col]
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        if np.isnan(self.min[j]) or np.isnan(self.max[j]) or self.max[j] == self.min[j]:
+            norm = np.zeros_like(valeurs)
+        else:
+            norm = (valeurs - self.min[j]) / (self.max[j] - self.min[j])
+        return norm if self.order[j] else 1 - norm
+
+    def _nan(self):
+        return np.full(self.n, np.nan)
+
+    def score_socio(self, selected_vars, weights):
+        """
+        Score de vulnérabilité socio-économique en [0, 100] pour chaque unité.
+
+        Args:
+            selected_vars (list): Labels "humains" des variables retenues.
+            weights (dict): {label_humain: poids_float}
+
+        Returns:
+            np.ndarray: Le score arrondi à 2 décimales (NaN si une variable retenue est manquante).
+        """
+        if not selected_vars:
+            return self._nan()
+
+        total_weight = sum(weights[v] for v in selected_vars if v in weights)
+        if total_weight <= 0:
+            return self._nan()
+
+        colonnes, poids = [], []
+        for var_label in selected_vars:
+            if var_label not in weights or var_label not in self.socio_vars:
+                continue
+            j = self.positions.get(self.socio_vars[var_label])
+            if j is None:
+                continue
+            colonnes.append(j)
+            poids.append(weights[var_label] / total_weight)
+
+        # Produit matrice-vecteur accumulé colonne par colonne, dans l'ordre des variables :
+        # l'ordre des additions est celui de l'ancienne boucle, donc l'arrondi est identique.
+        sous_matrice = self.norm_socio[:, colonnes]
+        score = np.zeros(self.n)
+        for k, w in enumerate(poids):
+            score = score + w * sous_matrice[:, k]
+
+        return np.round(score * 100, 2)
+
+    def score_acces(self, access_col):
+        """
+        Score de difficulté d'accès aux soins en [0, 100] (100 = difficulté max)
+        à partir d'une colonne APL.
+
+        Args:
+            access_col (str): Nom de la colonne APL.
+
+        Returns:
+            np.ndarray: Le score arrondi à 2 décimales.
+        """
+        j = self.positions.get(access_col)
+        if j is None:
+            return self._nan()
+
+        difficulte = 1 - self.norm[:, j]
+        return np.round(difficulte * 100, 2)
+
+    @staticmethod
+    def score_double(score_socio, score_acces, alpha=0.5):
+        """
+        Combine les scores socio et accès : DV = alpha * V + (1 - alpha) * score_acces.
+
+        Returns:
+            np.ndarray: Le score arrondi à 2 décimales.
+        """
+        return np.round(alpha * np.asarray(score_socio) + (1 - alpha) * np.asarray(score_acces), 2)
+
+    def to_series(self, values, name):
+        """Convertit un vecteur de scores en Series alignée sur l'index des unités."""
+        return pd.Series(values, index=self.index, name=name)
@@ -1,7 +1,10 @@
 import pandas as pd
+import numpy as np
 import json
 import os
 
+from cache_excel import lire_excels
+
 # Définition des chemins et des noms des fichiers
 DATA_DIR = "data/APL"
 OUTPUT_DIR = "data/APL/processed/"
@@ -28,28 +31,26 @@ def creer_json_communes_apl():
     """
     Lit les 5 fichiers Excel APL, extrait les données 2023 (se trouvant en page 3)
     et crée un dictionnaire JSON agrégé par commune.
+
+    Les 5 fichiers sont empilés dans une seule table (une ligne par commune et par métier) :
+    le nom et les populations viennent de la première ligne rencontrée pour chaque commune,
+    l'APL de chaque métier de la dernière ligne de la commune dans le fichier de ce métier.
     """
     
-    # Dictionnaire principal où les données agrégées seront stockées
-    # Clé: Code commune INSEE
-    communes_data = {}
-    
-    # 1. Traitement de chaque fichier métier
-    for cle_metier, nom_fichier in METIERS.items():
-        chemin_fichier = os.path.join(DATA_DIR, nom_fichier)
-        print(f"-> Traitement du fichier : {nom_fichier}")
+    # 1. Lecture des 5 classeurs (en parallèle, ou depuis le cache Parquet s'ils n'ont pas changé)
+    # Les données ne commencent qu'à partir de la ligne 11 (index 10)
+    tables = lire_excels([
+        (os.path.join(DATA_DIR, nom_fichier), {'sheet_name': SHEET_INDEX, 'header': 9})
+        for nom_fichier in METIERS.values()
+    ])
 
-        try:
-            # Charger la page souhaitée
-            # Les données ne commencent qu'à partir de la ligne 11 (index 10)
-            df = pd.read_excel(chemin_fichier, sheet_name=SHEET_INDEX, header=9)
-            
-        except FileNotFoundError:
-            print(f"ERREUR: Fichier non trouvé à {chemin_fichier}. Ignoré.")
+    # Traitement de chaque fichier métier
+    lignes_metiers = []
+    for (cle_metier, nom_fichier), df in zip(METIERS.items(), tables):
+        print(f"-> Traitement du fichier : {nom_fichier}")
+        if df is None:
+            print(f"ERREUR: Fichier {nom_fichier} introuvable ou feuille d'index {SHEET_INDEX} illisible. Ignoré.")
             continue
-        except ValueError:
-             print(f"ERREUR: La feuille d'index {SHEET_INDEX} n'existe pas dans {nom_fichier}. Ignoré.")
-             continue
         
         # 2. Identification des colonnes
         # On utilise les index numériques pour plus de robustesse car les titres varient.
@@ -59,77 +60,77 @@ def creer_json_communes_apl():
              print(f"ERREUR: Pas assez de colonnes dans {nom_fichier}. Attendu {max(3, idx_pop_std + 1, idx_pop_tot + 1)} minimum.")
              continue
         
-        # Renommage temporaire des colonnes pour la manipulation
-        df.columns.values[0] = 'Code_commune_INSEE'
-        df.columns.values[1] = 'Nom_commune'
-        
-        # On prend le nom de la colonne APL qui varie selon le métier
-        nom_col_apl = df.columns.values[2]
-        nom_col_pop_std = df.columns.values[idx_pop_std]
-        nom_col_pop_tot = df.columns.values[idx_pop_tot]
-        
-        # Sélection des colonnes nécessaires
-        df = df[['Code_commune_INSEE', 'Nom_commune', nom_col_apl, nom_col_pop_std, nom_col_pop_tot]].copy()
+        # Colonnes utiles (la colonne APL, 3ème colonne, varie selon le métier).
+        # Les valeurs restent des objets Python, comme lues ligne à ligne (entiers conservés dans le JSON).
+        df = df.reset_index(drop=True)
+        lignes = pd.DataFrame({
+            'code_insee': df.iloc[:, 0].map(str).str.zfill(5),
+            'nom_commune': df.iloc[:, 1].astype(object),
+            'population_standardisee': df.iloc[:, idx_pop_std].astype(object),
+            'population_totale': df.iloc[:, idx_pop_tot].astype(object),
+            'apl': df.iloc[:, 2].astype(object),
+            'metier': cle_metier,
+        })
         
-        # Renommage des colonnes pour le stockage dans le JSON
-        df.rename(columns={
-            nom_col_apl: f'apl_{cle_metier}',
-            nom_col_pop_std: 'population_standardisee',
-            nom_col_pop_tot: 'population_totale'
-        }, inplace=True)
-        
-        # 3. Remplissage du dictionnaire agrégé
-        for index, row in df.iterrows():
-            code_insee = str(row['Code_commune_INSEE'])
-            
-            # Utiliser la version du code INSEE sur 5 caractères
-            code_insee = code_insee.zfill(5)
-            
-            # S'assurer que la clé est un code INSEE valide (accepter les codes Corse avec A/B)
-            if len(code_insee) != 5:
-                continue
-            
-            # Exclure les communes d'outre-mer (code commençant par 97)
-            if code_insee.startswith('97'):
-                continue
-            
-            # Initialisation de l'entrée pour la commune si elle n'existe pas
-            if code_insee not in communes_data:
-                # Récupérer les populations (communes à tous les fichiers)
-                pop_std = row['population_standardisee']
-                pop_tot = row['population_totale']
-                
-                communes_data[code_insee] = {
-                    'nom_commune': row['Nom_commune'],
-                    'population_standardisee': None if pd.isna(pop_std) else pop_std,
-                    'population_totale': None if pd.isna(pop_tot) else pop_tot,
-                }
-            
-            # Ajout de l'APL spécifique
-            apl_valeur = row[f'apl_{cle_metier}']
-            
-            # Gestion des valeurs non numériques
-            if pd.isna(apl_valeur):
-                apl_valeur = None
-            
-            communes_data[code_insee][f'apl_{cle_metier}'] = apl_valeur
-            
+        # Codes INSEE valides sur 5 caractères (Corse avec A/B acceptée), hors outre-mer (code commençant par 97)
+        lignes = lignes[(lignes['code_insee'].str.len() == 5) & ~lignes['code_insee'].str.startswith('97')]
+        lignes_metiers.append(lignes)
+
+    # 3. Construction de la table large (une colonne APL par métier)
+    communes_data = {}
+    if lignes_metiers:
+        toutes = pd.concat(lignes_metiers, ignore_index=True)
+        for col in ['population_standardisee', 'population_totale', 'apl']:
+            toutes[col] = toutes[col].where(toutes[col].notna(), None)
+
+        communes = toutes.drop_duplicates('code_insee', keep='first').set_index('code_insee')
+        communes = communes[['nom_commune', 'population_standardisee', 'population_totale']]
+
+        apl = toutes.drop_duplicates(['code_insee', 'metier'], keep='last')
+        lus = set(apl['metier'].unique())
+        metiers = [cle for cle in METIERS if cle in lus]
+        valeurs = apl.pivot(index='code_insee', columns='metier', values='apl').reindex(index=communes.index, columns=metiers)
+        presentes = apl.assign(present=True).pivot(index='code_insee', columns='metier', values='present') \
+            .reindex(index=communes.index, columns=metiers).notna().to_numpy()
+        valeurs = valeurs.astype(object).where(valeurs.notna(), None)
+        communes = communes.join(valeurs.add_prefix('apl_'))
+
+        # Dictionnaire {code_insee: {attribut: valeur}} construit à partir des colonnes (listes Python)
+        codes = communes.index.tolist()
+        colonnes = list(communes.columns)
+        valeurs_lignes = zip(*(communes[col].tolist() for col in colonnes))
+        communes_data = {code: dict(zip(colonnes, ligne)) for code, ligne in zip(codes, valeurs_lignes)}
+
+        # Une commune absente du fichier d'un métier n'a pas de clé pour cet APL
+        for i, j in zip(*np.nonzero(~presentes)):
+            del communes_data[codes[i]][f'apl_{metiers[j]}']
+
     # 4. Sauvegarde du fichier JSON des communes
     fichier_output_communes = os.path.join(OUTPUT_DIR, 'apl_communes.json')
     with open(fichier_output_communes, 'w', encoding='utf-8') as f:
-        json.dump(communes_data, f, ensure_ascii=False, indent=4)
+        f.write(json.dumps(communes_data, ensure_ascii=False, indent=4))
         
     print(f"\nFichier JSON des communes créé avec succès : {fichier_output_communes}")
     print(f"Nombre total de communes traitées : {len(communes_data)}")
     
     return communes_data
 
+
+def _valeurs(communes_data, cle):
+    """Valeurs d'un attribut pour toutes les communes, dans l'ordre du fichier (NaN si absent ou null)."""
+    return np.array([np.nan if (v := donnees.get(cle)) is None else v for donnees in communes_data.values()],
+                    dtype=np.float64)
+
+
 # Fonction pour créer le fichier JSON départements
 def creer_json_departements_apl():
     """
     Crée un fichier JSON des départements avec les APL calculés par moyenne pondérée.
     La formule utilisée : APL_D = Σ(APL_i × P_i) / Σ(P_i)
     où P_i est la population standardisée de chaque commune i du département.
+
+    Les sommes par département sont calculées avec np.bincount, qui additionne les communes
+    dans l'ordre du fichier (mêmes arrondis flottants qu'une accumulation commune par commune).
     """
     
     # 1. Charger les données des communes depuis le fichier JSON
@@ -145,71 +146,44 @@ def creer_json_departements_apl():
     
     print(f"-> Chargement de {len(communes_data)} communes depuis {fichier_communes}")
     
-    # 2. Dictionnaire pour stocker les données départementales
-    departements_data = {}
-    
-    # 3. Regrouper les communes par département
-    for code_insee, donnees_commune in communes_data.items():
-        # Extraire le code département (gestion spéciale pour la Corse)
-        code_dept = code_insee[:2]
-        
-        if code_dept is None:
-            continue
-        
-        # Exclure les départements d'outre-mer (code commençant par 97)
-        if code_dept.startswith('97'):
-            continue
-        
-        # Initialiser le département s'il n'existe pas encore
-        if code_dept not in departements_data:
-            departements_data[code_dept] = {
-                'population_totale': 0,
-                'population_standardisee': 0,
-            }
-            # Initialiser les sommes pour chaque métier
-            for cle_metier in METIERS.keys():
-                departements_data[code_dept][f'somme_apl_{cle_metier}_x_pop'] = 0
-                departements_data[code_dept][f'somme_pop_{cle_metier}'] = 0
-
-
-        # Récupérer la population standardisée de la commune
-        pop_std = donnees_commune.get('population_standardisee')
-        pop_tot = donnees_commune.get('population_totale')
-        
-        # Ajouter la population totale du département
-        if pop_tot is not None and pop_tot != 0:
-            departements_data[code_dept]['population_totale'] += pop_tot
-        
-        # Pour chaque métier, calculer les sommes nécessaires
-        for cle_metier in METIERS.keys():
-            apl_commune = donnees_commune.get(f'apl_{cle_metier}')
-            
-            # Si l'APL et la population sont valides
-            if apl_commune is not None and pop_std is not None and pop_std != 0:
-                departements_data[code_dept][f'somme_apl_{cle_metier}_x_pop'] += apl_commune * pop_std
-                departements_data[code_dept][f'somme_pop_{cle_metier}'] += pop_std
+    # 2. Département de chaque commune (2 premiers caractères, Corse 2A/2B comprise), hors outre-mer (97)
+    codes_dept = pd.Series([code_insee[:2] for code_insee in communes_data], dtype=object)
+    metropole = ~codes_dept.str.startswith('97').to_numpy()
+    groupes, departements = pd.factorize(codes_dept[metropole])
+    nb = len(departements)
+
+    # 3. Population totale : somme des populations renseignées et non nulles
+    pop_tot = _valeurs(communes_data, 'population_totale')[metropole]
+    comptees = ~np.isnan(pop_tot) & (pop_tot != 0)
+    somme_pop_tot = np.bincount(groupes[comptees], weights=pop_tot[comptees], minlength=nb)
+    # La somme reste entière si toutes les populations additionnées sont entières dans le JSON
+    flottantes = np.array([isinstance(donnees.get('population_totale'), float) for donnees in communes_data.values()],
+                          dtype=bool)
+    somme_flottante = np.bincount(groupes, weights=(flottantes[metropole] & comptees), minlength=nb) > 0
 
+    # 4. APL pondéré par la population standardisée (communes avec APL et population non nulle)
+    pop_std = _valeurs(communes_data, 'population_standardisee')[metropole]
+    apl_departements = {}
+    for cle_metier in METIERS.keys():
+        apl_commune = _valeurs(communes_data, f'apl_{cle_metier}')[metropole]
+        valides = ~np.isnan(apl_commune) & ~np.isnan(pop_std) & (pop_std != 0)
+        somme_apl_x_pop = np.bincount(groupes[valides], weights=apl_commune[valides] * pop_std[valides], minlength=nb)
+        somme_pop = np.bincount(groupes[valides], weights=pop_std[valides], minlength=nb)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            apl_departements[cle_metier] = np.where(somme_pop > 0, somme_apl_x_pop / somme_pop, np.nan)
 
-    # 4. Calculer l'APL final pour chaque département et métier
+    # 5. Construction du dictionnaire final (round() de Python sur des flottants Python)
     departements_final = {}
-    
-    for code_dept, donnees in departements_data.items():
+    for i, code_dept in enumerate(departements):
+        population = float(somme_pop_tot[i]) if somme_flottante[i] else int(somme_pop_tot[i])
         departements_final[code_dept] = {
-            'population_totale': round(donnees['population_totale'], 0),
+            'population_totale': round(population, 0),
         }
-        
-        # Calculer l'APL pour chaque métier selon la formule
         for cle_metier in METIERS.keys():
-            somme_apl_x_pop = donnees[f'somme_apl_{cle_metier}_x_pop']
-            somme_pop = donnees[f'somme_pop_{cle_metier}']
-            
-            if somme_pop > 0:
-                apl_dept = somme_apl_x_pop / somme_pop
-                departements_final[code_dept][f'apl_{cle_metier}'] = round(apl_dept, 2)
-            else:
-                departements_final[code_dept][f'apl_{cle_metier}'] = None
+            apl_dept = apl_departements[cle_metier][i]
+            departements_final[code_dept][f'apl_{cle_metier}'] = None if np.isnan(apl_dept) else round(float(apl_dept), 2)
     
-    # 5. Sauvegarde du fichier JSON des départements
+    # 6. Sauvegarde du fichier JSON des départements
     fichier_output_departements = os.path.join(OUTPUT_DIR, 'apl_departements.json')
     with open(fichier_output_departements, 'w', encoding='utf-8') as f:
         json.dump(departements_final, f, ensure_ascii=False, indent=4)
@@ -0,0 +1,159 @@
+import datetime
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Définition des chemins
+DOSSIER_CACHE = "data/.cache_excel"
+
+# À incrémenter si le format des fichiers du cache change (les anciens ne sont alors plus lus)
+VERSION_CACHE = 1
+
+# Préfixe des colonnes techniques qui conservent le type d'origine des colonnes de types mélangés
+PREFIXE_TYPES = "__type__"
+
+
+# ===========================
+# Conversion DataFrame <-> Parquet sans perte de type
+# ===========================
+
+def _code_type(valeur):
+    if isinstance(valeur, (bool, np.bool_)):
+        return "b"
+    if isinstance(valeur, (int, np.integer)):
+        return "i"
+    if isinstance(valeur, (float, np.floating)):
+        return "f"
+    if isinstance(valeur, datetime.datetime):
+        return "d"
+    return "s"
+
+
+_DECODEURS = {
+    "b": lambda v: v == "True",
+    "i": int,
+    "f": float,
+    "d": pd.Timestamp,
+    "s": str,
+}
+
+
+def _encoder(df):
+    """
+    Prépare une feuille Excel pour Parquet : chaque colonne contenant des valeurs de types différents
+    (ex : nombres et « N/A ») est écrite en texte, accompagnée d'une colonne technique indiquant
+    le type d'origine de chaque valeur.
+    """
+    # Index positionnel (l'index n'est pas écrit ; reindex exige des étiquettes uniques)
+    df = df.reset_index(drop=True)
+    for col in list(df.columns):
+        if df[col].dtype != object:
+            continue
+        non_nulles = df[col].dropna()
+        codes = non_nulles.map(_code_type)
+        if codes.nunique() <= 1 and (codes.empty or codes.iloc[0] == "s"):
+            continue
+        df[PREFIXE_TYPES + col] = codes.reindex(df.index)
+        df[col] = non_nulles.astype(str).reindex(df.index)
+    return df
+
+
+def _decoder(df):
+    """Inverse de _encoder : restaure le type d'origine des valeurs des colonnes mélangées."""
+    for col_types in [col for col in df.columns if col.startswith(PREFIXE_TYPES)]:
+        col = col_types[len(PREFIXE_TYPES):]
+        valeurs = df[col].astype(object)
+        for code, decodeur in _DECODEURS.items():
+            masque = df[col_types] == code
+            if masque.any():
+                valeurs[masque] = [decodeur(v) for v in df.loc[masque, col]]
+        valeurs[df[col_types].isna()] = np.nan
+        df[col] = valeurs
+        df = df.drop(columns=col_types)
+    return df
+
+
+# ===========================
+# Lecture avec cache
+# ===========================
+
+def chemin_cache(chemin_excel, options, dossier_cache=DOSSIER_CACHE):
+    """
+    Chemin du fichier Parquet en cache pour une feuille : la clé combine l'empreinte SHA-256
+    du classeur et les options de lecture (un classeur modifié ou d'autres options = autre fichier).
+    """
+    with open(chemin_excel, 'rb') as f:
+        empreinte = hashlib.file_digest(f, "sha256").hexdigest()
+    cle = json.dumps([VERSION_CACHE, empreinte, options], sort_keys=True, default=str)
+    nom = os.path.splitext(os.path.basename(chemin_excel))[0]
+    return os.path.join(dossier_cache, f"{nom}_{hashlib.sha256(cle.encode()).hexdigest()[:16]}.parquet")
+
+
+def _lire_et_mettre_en_cache(chemin_excel, options, chemin_parquet):
+    """Lit une feuille Excel (openpyxl) et l'enregistre en Parquet. Exécuté dans un worker."""
+    df = pd.read_excel(chemin_excel, **options)
+    # Mêmes noms de colonnes qu'à la relecture depuis le cache
+    df.columns = [str(col) for col in df.columns]
+    os.makedirs(os.path.dirname(chemin_parquet), exist_ok=True)
+    temporaire = chemin_parquet + f".{os.getpid()}.tmp"
+    _encoder(df).to_parquet(temporaire, index=False, engine='pyarrow')
+    os.replace(temporaire, chemin_parquet)
+    return df
+
+
+def lire_excels(demandes, nb_workers=None, dossier_cache=DOSSIER_CACHE):
+    """
+    Lit plusieurs feuilles Excel en passant par un cache Parquet : une feuille déjà convertie
+    (même classeur, mêmes options) est relue depuis le Parquet, sans analyser le xlsx ;
+    les autres sont lues en parallèle dans des processus puis mises en cache.
+
+    Les noms de colonnes sont convertis en texte (Parquet n'accepte pas d'autres types).
+
+    Args:
+        demandes (list): [(chemin_excel, {options de pd.read_excel}), ...]
+        nb_workers (int): Nombre de processus pour les feuilles absentes du cache (None = nombre de cœurs).
+        dossier_cache (str): Dossier des fichiers Parquet.
+
+    Returns:
+        list: Un pd.DataFrame par demande, dans l'ordre (None si le fichier est introuvable ou illisible).
+    """
+    resultats = [None] * len(demandes)
+    a_lire = {}
+    for i, (chemin_excel, options) in enumerate(demandes):
+        if not os.path.exists(chemin_excel):
+            print(f"❌ Fichier introuvable : {chemin_excel}")
+            continue
+        chemin_parquet = chemin_cache(chemin_excel, options, dossier_cache)
+        if os.path.exists(chemin_parquet):
+            print(f"♻️  {os.path.basename(chemin_excel)} : lu depuis le cache ({chemin_parquet})")
+            resultats[i] = _decoder(pd.read_parquet(chemin_parquet))
+        else:
+            a_lire[i] = (chemin_excel, options, chemin_parquet)
+
+    if not a_lire:
+        return resultats
+
+    nb_workers = min(nb_workers or os.cpu_count() or 1, len(a_lire))
+    print(f"🔄 Lecture de {len(a_lire)} classeur(s) Excel sur {nb_workers} processus...")
+    with ProcessPoolExecutor(max_workers=nb_workers) as pool:
+        futures = {i: pool.submit(_lire_et_mettre_en_cache, *args) for i, args in a_lire.items()}
+        for i, futur in futures.items():
+            chemin_excel, options, chemin_parquet = a_lire[i]
+            try:
+                resultats[i] = futur.result()
+                print(f"✅ {os.path.basename(chemin_excel)} : mis en cache ({chemin_parquet})")
+            except Exception as e:
+                print(f"❌ Lecture impossible de {chemin_excel} ({options}) : {e}")
+    return resultats
+
+
+def lire_excel(chemin_excel, **options):
+    """Lit une feuille Excel via le cache Parquet (voir lire_excels), comme pd.read_excel."""
+    df = lire_excels([(chemin_excel, options)])[0]
+    if df is None:
+        raise FileNotFoundError(f"Classeur introuvable ou illisible : {chemin_excel}")
+    return df
@@ -1,11 +1,33 @@
 import json
 import os
 import glob
+import pandas as pd
 
 # Définition des chemins
 DATA_DIR = "data"
 OUTPUT_DIR = "data"
 
+def exporter_parquet(donnees, chemin_parquet):
+    """
+    Exporte un dictionnaire {code: {attribut: valeur}} au format Parquet (colonnes typées).
+    La clé du dictionnaire devient la colonne 'code_insee'.
+
+    Args:
+        donnees (dict): Dictionnaire des données fusionnées.
+        chemin_parquet (str): Chemin du fichier Parquet à créer.
+    """
+    df = pd.DataFrame.from_dict(donnees, orient='index')
+    df.index.name = 'code_insee'
+    df = df.reset_index()
+
+    # Les colonnes texte doivent être homogènes pour pyarrow (ex: codes postaux)
+    for col in df.select_dtypes(include='object').columns:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    df.to_parquet(chemin_parquet, index=False, engine='pyarrow')
+    print(f"Fichier Parquet créé : {chemin_parquet} ({len(df)} lignes, {df.shape[1]} colonnes)")
+
+
 def fusionner_communes_json():
     """
     Fusionne tous les fichiers JSON se terminant par 'communes.json' 
@@ -68,6 +90,8 @@ def fusionner_communes_json():
     print("\n" + "=" * 60)
     print(f"Fichier communes fusionné créé : {fichier_output}")
     print(f"   Nombre total de communes : {len(communes_triees)}")
+
+    exporter_parquet(communes_triees, os.path.join(OUTPUT_DIR, 'communes.parquet'))
     
     return communes_fusionnees
 
@@ -130,6 +154,8 @@ def fusionner_departements_json():
     
     print(f"\nFichier départements fusionné créé : {fichier_output}")
     print(f"   Nombre total de départements : {len(departements_fusionnes)}")
+
+    exporter_parquet(departements_fusionnes, os.path.join(OUTPUT_DIR, 'departements.parquet'))
     
     return departements_fusionnes
 
@@ -0,0 +1,61 @@
+import geopandas as gpd
+import os
+from geometrie_departements import construire_pyramide
+from partition_communes import code_departement
+
+# Définition des chemins
+CHEMIN_GPKG = "data/communes.gpkg"
+DOSSIER_SORTIE = "data/communes_geometrie"
+
+# Niveaux de détail des communes (colonne géométrique -> tolérance en degrés).
+# Le niveau national des départements (0.02) ferait disparaître les petites communes :
+# on ne garde que les niveaux utiles aux vues d'un département.
+NIVEAUX = {
+    "geometry_regional": 0.005,
+    "geometry_departemental": 0.001,
+}
+
+
+def creer_geometrie_communes(chemin_gpkg=CHEMIN_GPKG, dossier_sortie=DOSSIER_SORTIE, niveaux=NIVEAUX, layer_name='commune'):
+    """
+    Extrait les polygones des communes du GeoPackage, les reprojette en WGS84,
+    précalcule leurs niveaux de détail sur toute la France (les frontières entre
+    départements restent identiques) puis écrit un GeoParquet par département.
+
+    Args:
+        chemin_gpkg (str): Chemin du GeoPackage des communes.
+        dossier_sortie (str): Dossier dans lequel écrire un fichier par département.
+        niveaux (dict): {nom_colonne: tolérance en degrés}.
+        layer_name (str): Couche des communes dans le GeoPackage.
+
+    Returns:
+        dict: {code_dep: nombre de communes écrites}.
+    """
+    if not os.path.exists(chemin_gpkg):
+        print(f"❌ Fichier non trouvé : {chemin_gpkg}")
+        return {}
+
+    print(f"-> Chargement de la couche '{layer_name}' depuis {chemin_gpkg}...")
+    gdf = gpd.read_file(chemin_gpkg, layer=layer_name)
+    gdf["code_insee"] = gdf["code_insee"].astype(str).str.zfill(5)
+    gdf = gdf[["code_insee", gdf.geometry.name]].dropna(subset=[gdf.geometry.name])
+
+    if gdf.crs is None or gdf.crs.to_epsg() != 4326:
+        print(f"-> Reprojection vers WGS84 (EPSG:4326)...")
+        gdf = gdf.to_crs(epsg=4326)
+
+    gdf = construire_pyramide(gdf, niveaux)
+
+    os.makedirs(dossier_sortie, exist_ok=True)
+    resume = {}
+    for code_dep, gdf_dep in gdf.groupby(code_departement(gdf["code_insee"]), sort=True):
+        gdf_dep = gdf_dep.sort_values("code_insee").reset_index(drop=True)
+        gdf_dep.to_parquet(os.path.join(dossier_sortie, f"{code_dep}.parquet"), index=False, compression="zstd")
+        resume[code_dep] = len(gdf_dep)
+
+    print(f"✅ Polygones de {sum(resume.values())} communes écrits dans {dossier_sortie} ({len(resume)} départements)")
+    return resume
+
+
+if __name__ == "__main__":
+    creer_geometrie_communes()
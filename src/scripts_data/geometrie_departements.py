@@ -0,0 +1,103 @@
+import geopandas as gpd
+import os
+
+# Définition des chemins
+CHEMIN_GEOJSON = "data/departements_polygon.geojson"
+CHEMIN_GEOMETRIE = "data/departements_geometrie.parquet"
+
+# Pyramide de niveaux de détail : colonne géométrique -> tolérance de simplification en degrés.
+# "geometry" est le niveau national (celui qui était appliqué à chaque affichage),
+# les niveaux plus fins servent aux vues zoomées (région, département).
+NIVEAUX = {
+    "geometry": 0.02,
+    "geometry_regional": 0.005,
+    "geometry_departemental": 0.001,
+}
+
+
+def simplifier_geometries(geometries, tolerance):
+    """
+    Simplifie un ensemble de polygones adjacents en conservant les frontières communes
+    (simplification de couverture : deux voisins gardent exactement la même frontière).
+    Si la couverture est invalide (chevauchements), on se rabat sur une simplification
+    classique qui préserve la topologie de chaque polygone.
+
+    Args:
+        geometries (gpd.GeoSeries): Les géométries à simplifier.
+        tolerance (float): Tolérance de simplification (unité du CRS).
+
+    Returns:
+        gpd.GeoSeries: Les géométries simplifiées.
+    """
+    geometries = geometries.make_valid()
+    try:
+        return geometries.simplify_coverage(tolerance)
+    except Exception as e:
+        print(f"⚠️ Simplification de couverture impossible ({e}), simplification polygone par polygone.")
+        return geometries.simplify(tolerance, preserve_topology=True)
+
+
+def construire_pyramide(gdf, niveaux=NIVEAUX):
+    """
+    Ajoute à un GeoDataFrame une colonne géométrique par niveau de détail.
+    Chaque niveau est simplifié à partir de la géométrie d'origine (et non du niveau
+    précédent), pour que les erreurs de simplification ne se cumulent pas.
+
+    Args:
+        gdf (gpd.GeoDataFrame): Les géométries d'origine (colonne active), en WGS84.
+        niveaux (dict): {nom_colonne: tolérance en degrés}.
+
+    Returns:
+        gpd.GeoDataFrame: Le GeoDataFrame avec une colonne par niveau.
+    """
+    nom_origine = gdf.geometry.name
+    origine = gdf.geometry.copy()
+    for colonne, tolerance in sorted(niveaux.items(), key=lambda x: -x[1]):
+        print(f"-> Niveau '{colonne}' : simplification de {len(gdf)} géométries (tolérance {tolerance})...")
+        gdf[colonne] = simplifier_geometries(origine, tolerance)
+
+    gdf = gdf.set_geometry("geometry" if "geometry" in niveaux else list(niveaux)[0])
+    if nom_origine not in niveaux:
+        gdf = gdf.drop(columns=nom_origine)
+    return gdf
+
+
+def creer_geometrie_departements(chemin_geojson=CHEMIN_GEOJSON, chemin_sortie=CHEMIN_GEOMETRIE, niveaux=NIVEAUX):
+    """
+    Lit le GeoJSON brut des départements, le reprojette en WGS84, précalcule la pyramide
+    de niveaux de détail une seule fois et l'enregistre dans un fichier GeoParquet
+    (une colonne géométrique WKB par niveau).
+
+    Args:
+        chemin_geojson (str): Chemin du GeoJSON brut des départements.
+        chemin_sortie (str): Chemin du fichier GeoParquet à créer.
+        niveaux (dict): {nom_colonne: tolérance en degrés}.
+
+    Returns:
+        gpd.GeoDataFrame: Les départements simplifiés (code_insee, une géométrie par niveau).
+    """
+    if not os.path.exists(chemin_geojson):
+        print(f"❌ Fichier non trouvé : {chemin_geojson}")
+        return None
+
+    print(f"-> Lecture de {chemin_geojson}...")
+    gdf = gpd.read_file(chemin_geojson)
+    gdf["code_insee"] = gdf["code_insee"].astype(str).str.zfill(2)
+    gdf = gdf[["code_insee", "geometry"]].dropna(subset=["geometry"])
+
+    if gdf.crs is None or gdf.crs.to_epsg() != 4326:
+        print(f"-> Reprojection vers WGS84 (EPSG:4326)...")
+        gdf = gdf.to_crs(epsg=4326)
+
+    gdf = construire_pyramide(gdf, niveaux)
+
+    gdf = gdf.sort_values("code_insee").reset_index(drop=True)
+    gdf.to_parquet(chemin_sortie, index=False, compression="zstd")
+
+    taille_ko = os.path.getsize(chemin_sortie) / 1024
+    print(f"✅ Géométries enregistrées : {chemin_sortie} ({taille_ko:.0f} Ko)")
+    return gdf
+
+
+if __name__ == "__main__":
+    creer_geometrie_departements()
@@ -0,0 +1,265 @@
+import csv
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+# ===========================
+# Spécifications des fichiers CSV à convertir
+# ===========================
+
+# Une entrée par fichier source :
+# - fichier : CSV d'entrée ; sortie : JSON produit (un Parquet du même nom est écrit à côté)
+# - ligne_titres : numéro de la ligne des en-têtes (0 = 1ère ligne)
+# - delimiteur : séparateur du CSV
+# - cle : ("Nom_Colonne_CSV", "type") de la clé unique du JSON
+# - colonnes : [("Nom_Colonne_CSV", "nom_json", "type"), ...] ; types : "str", "int", "float", "bool"
+# - arrondi (optionnel) : nombre de décimales des colonnes "float"
+SPECS = {
+    "famille_monoparentale_communes": {
+        "fichier": "data/famille_monoparentale/famille_monoparentale_communes.csv",
+        "sortie": "data/famille_monoparentale/famille_monoparentale_communes.json",
+        "ligne_titres": 2,
+        "delimiteur": ";",
+        "cle": ("Code", "str"),
+        "colonnes": [
+            ("Libellé", "nom_commune", "str"),
+            ("Part des familles monoparentales 2022", "part_familles_monoparentales", "float"),
+        ],
+    },
+    "famille_monoparentale_departements": {
+        "fichier": "data/famille_monoparentale/famille_monoparentale_departements.csv",
+        "sortie": "data/famille_monoparentale/famille_monoparentale_departements.json",
+        "ligne_titres": 2,
+        "delimiteur": ";",
+        "cle": ("Code", "str"),
+        "colonnes": [
+            ("Libellé", "nom_departement", "str"),
+            ("Part des familles monoparentales 2022", "part_familles_monoparentales", "float"),
+        ],
+    },
+    "part_personnes_agees_communes": {
+        "fichier": "data/part_personnes_agees/part_personnes_agees_communes.csv",
+        "sortie": "data/part_personnes_agees/part_personnes_agees_communes.json",
+        "ligne_titres": 2,
+        "delimiteur": ";",
+        "cle": ("Code", "str"),
+        "colonnes": [
+            ("Libellé", "nom_commune", "str"),
+            ("Part des pers. âgées de 75 ans ou + 2022", "part_personnes_agees_75_plus", "float"),
+        ],
+    },
+    "part_personnes_agees_departements": {
+        "fichier": "data/part_personnes_agees/part_personnes_agees_departements.csv",
+        "sortie": "data/part_personnes_agees/part_personnes_agees_departements.json",
+        "ligne_titres": 2,
+        "delimiteur": ";",
+        "cle": ("Code", "str"),
+        "colonnes": [
+            ("Libellé", "nom_departement", "str"),
+            ("Part des pers. âgées de 75 ans ou + 2022", "part_personnes_agees_75_plus", "float"),
+        ],
+    },
+    "tx_chomage_departements": {
+        "fichier": "data/tx_chomage/tx_chomage_departements.csv",
+        "sortie": "data/tx_chomage/tx_chomage_departements.json",
+        "ligne_titres": 2,
+        "delimiteur": ";",
+        "cle": ("Code", "str"),
+        "colonnes": [
+            ("Libellé", "nom_departement", "str"),
+            ("Taux de chômage annuel moyen 2024", "tx_chomage_moyen", "float"),
+            ("Taux de chômage annuel moyen des 15 à 24 ans 2024", "tx_chomage_moyen_15_24_ans", "float"),
+            ("Taux de chômage annuel moyen des 25 à 49 ans 2024", "tx_chomage_moyen_25_49_ans", "float"),
+            ("Taux de chômage annuel moyen des 50 ans ou plus 2024", "tx_chomage_moyen_50_ans_plus", "float"),
+            ("Taux de chômage annuel moyen des femmes 2024", "tx_chomage_moyen_femmes", "float"),
+            ("Taux de chômage annuel moyen des hommes 2024", "tx_chomage_moyen_hommes", "float"),
+        ],
+    },
+    "fedi_communes": {
+        "fichier": "data/fedi/fedi.csv",
+        "sortie": "data/fedi/fedi_communes.json",
+        "ligne_titres": 0,
+        "delimiteur": ",",
+        "cle": ("Commune Code", "str"),
+        "colonnes": [
+            ("Commune", "Commune", "str"),
+            ("EDI", "EDI", "float"),
+        ],
+        "arrondi": 2,
+    },
+}
+
+# Nombre de lignes en erreur affichées en exemple pour chaque type d'erreur
+NB_EXEMPLES_ERREURS = 5
+
+VALEURS_VRAIES = ["true", "1", "yes", "vrai"]
+
+BOM = "\ufeff"
+
+
+# ===========================
+# Lecture et typage vectorisés
+# ===========================
+
+def lire_en_tetes(chemin, ligne_titres, delimiteur):
+    """Lit la ligne des en-têtes (le BOM éventuel en début de fichier est retiré)."""
+    with open(chemin, mode='r', encoding='utf-8-sig', newline='') as f:
+        lecteur = csv.reader(f, delimiter=delimiteur)
+        for _ in range(ligne_titres):
+            next(lecteur, None)
+        en_tetes = next(lecteur, None)
+    if en_tetes is None:
+        raise ValueError(f"Ligne d'en-tête {ligne_titres} inaccessible dans {chemin}")
+    return [nom.lstrip(BOM) for nom in en_tetes]
+
+
+def lire_csv(chemin, ligne_titres, delimiteur, colonnes):
+    """
+    Lit les colonnes utiles d'un CSV avec le lecteur d'Arrow, toutes en texte.
+    Les lignes mal formées (nombre de champs différent de l'en-tête) sont écartées et retournées à part.
+
+    Args:
+        chemin (str): Fichier CSV.
+        ligne_titres (int): Numéro de la ligne des en-têtes (0-based).
+        delimiteur (str): Séparateur du CSV.
+        colonnes (list): Noms des colonnes à lire.
+
+    Returns:
+        tuple: (pd.DataFrame de chaînes, [texte des lignes écartées])
+    """
+    en_tetes = lire_en_tetes(chemin, ligne_titres, delimiteur)
+    manquantes = [nom for nom in colonnes if nom not in en_tetes]
+    if manquantes:
+        raise KeyError(f"Colonne(s) absente(s) du CSV : {manquantes}. Colonnes trouvées : {en_tetes}")
+
+    lignes_invalides = []
+
+    def _ecarter(ligne):
+        lignes_invalides.append(ligne.text)
+        return "skip"
+
+    table = pv.read_csv(
+        chemin,
+        read_options=pv.ReadOptions(skip_rows=ligne_titres + 1, column_names=en_tetes, encoding="utf8"),
+        parse_options=pv.ParseOptions(delimiter=delimiteur, invalid_row_handler=_ecarter),
+        convert_options=pv.ConvertOptions(
+            include_columns=colonnes,
+            column_types={nom: pa.string() for nom in colonnes},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    return table.to_pandas(), lignes_invalides
+
+
+def typer_colonne(valeurs, type_col):
+    """
+    Convertit une colonne de chaînes dans son type. Les cases vides des colonnes numériques
+    deviennent NaN ; les valeurs non convertibles sont signalées dans le masque d'erreurs.
+
+    Returns:
+        tuple: (pd.Series typée, masque booléen des valeurs invalides)
+    """
+    texte = valeurs.str.strip()
+    vides = texte == ""
+
+    if type_col == "float":
+        nombres = pd.to_numeric(texte.mask(vides), errors="coerce")
+        return nombres.astype("float64"), nombres.isna() & ~vides
+    if type_col == "int":
+        valides = texte.str.fullmatch(r"[+-]?\d+")
+        nombres = pd.to_numeric(texte.where(valides), errors="coerce").astype("Int64")
+        return nombres, ~valides & ~vides
+    if type_col == "bool":
+        return valeurs.str.lower().isin(VALEURS_VRAIES), pd.Series(False, index=valeurs.index)
+    return valeurs, pd.Series(False, index=valeurs.index)
+
+
+def signaler(message, exemples):
+    """Affiche une erreur une seule fois pour tout un lot de lignes, avec quelques exemples."""
+    if len(exemples) == 0:
+        return
+    apercu = ", ".join(repr(e) for e in list(exemples)[:NB_EXEMPLES_ERREURS])
+    suite = " ..." if len(exemples) > NB_EXEMPLES_ERREURS else ""
+    print(f"⚠️  {len(exemples)} ligne(s) ignorée(s) - {message} : {apercu}{suite}")
+
+
+def convertir_csv(spec):
+    """
+    Convertit un CSV décrit par une spécification (voir SPECS) en JSON {clé: {colonne: valeur}}
+    et en Parquet (colonne 'code_insee' + une colonne par champ).
+
+    Une ligne est ignorée si sa clé est vide ou si une valeur non vide ne peut pas être typée.
+    Contrairement aux anciens convertisseurs, qui les écrivaient sous la clé "", les lignes
+    à clé vide (ex : lignes de notes en fin de fichier) sont écartées et signalées.
+
+    Args:
+        spec (dict): Spécification du fichier.
+
+    Returns:
+        pd.DataFrame: Les données typées, indexées par la clé (None si le fichier est absent).
+    """
+    chemin = spec["fichier"]
+    if not os.path.exists(chemin):
+        print(f"❌ Fichier introuvable : {chemin}")
+        return None
+
+    print(f"🔄 Lecture de : {chemin}")
+    nom_cle, type_cle = spec["cle"]
+    colonnes_csv = [nom_cle] + [col[0] for col in spec["colonnes"]]
+    brut, lignes_invalides = lire_csv(chemin, spec["ligne_titres"], spec["delimiteur"], list(dict.fromkeys(colonnes_csv)))
+    signaler("nombre de champs incorrect", lignes_invalides)
+
+    # Typage colonne par colonne ; les erreurs sont accumulées dans un seul masque
+    cle, erreurs_cle = typer_colonne(brut[nom_cle], type_cle)
+    # Clé vide : ligne écartée (les anciens scripts produisaient une entrée "")
+    erreurs_cle |= brut[nom_cle].str.strip() == ""
+    signaler(f"clé '{nom_cle}' vide ou invalide", brut[nom_cle][erreurs_cle])
+    erreurs = erreurs_cle.copy()
+
+    df = pd.DataFrame(index=brut.index)
+    for nom_csv, nom_json, type_col in spec["colonnes"]:
+        df[nom_json], erreurs_col = typer_colonne(brut[nom_csv], type_col)
+        nouvelles = erreurs_col & ~erreurs
+        signaler(f"conversion de '{nom_csv}' en {type_col}",
+                 (brut[nom_cle][nouvelles] + " -> " + brut[nom_csv][nouvelles]).tolist())
+        erreurs |= erreurs_col
+        if type_col == "float" and "arrondi" in spec:
+            # round() de Python (arrondi décimal exact), comme les anciens scripts
+            df[nom_json] = df[nom_json].map(lambda v: round(v, spec["arrondi"]), na_action="ignore")
+
+    df.index = cle
+    df = df[~erreurs.to_numpy()]
+    # Clé en double : la dernière ligne l'emporte, à la place de la première (comme un dict)
+    df = df[~df.index.duplicated(keep="last")].reindex(df.index.unique())
+    df.index.name = nom_cle
+
+    # Écriture colonnaire (Parquet) puis JSON au format attendu par fusion_json.py
+    chemin_json = spec["sortie"]
+    chemin_parquet = os.path.splitext(chemin_json)[0] + ".parquet"
+    df.rename_axis("code_insee").reset_index().to_parquet(chemin_parquet, index=False)
+
+    donnees = df.astype(object).where(df.notna(), None).to_dict(orient="index")
+    with open(chemin_json, "w", encoding="utf-8") as f:
+        json.dump(donnees, f, indent=4, ensure_ascii=False)
+
+    nb_ignorees = len(lignes_invalides) + int(erreurs.sum())
+    print(f"✅ {chemin_json} : {len(df)} objets créés, {nb_ignorees} ligne(s) ignorée(s) (Parquet : {chemin_parquet})")
+    return df
+
+
+def convertir_tout(noms=None):
+    """Convertit tous les fichiers de SPECS (ou seulement ceux nommés)."""
+    resultats = {}
+    for nom in noms or SPECS:
+        resultats[nom] = convertir_csv(SPECS[nom])
+    return resultats
+
+
+if __name__ == "__main__":
+    # python src/scripts_data/ingestion_csv.py [nom_spec ...]
+    convertir_tout(sys.argv[1:] or None)
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Le calcul est partagé avec l'application (src/lissage.py) : la racine du dépôt doit être importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from src.lissage import lisser_communes
+from src.registry import get_registry
+
+from fusion_json import exporter_parquet
+
+# Définition des chemins
+CHEMIN_COMMUNES = "data/communes.json"
+CHEMIN_SORTIE_JSON = "data/communes_lissees.json"
+CHEMIN_SORTIE_PARQUET = "data/communes_lissees.parquet"
+
+
+def creer_communes_lissees(chemin_communes=CHEMIN_COMMUNES, colonnes=None,
+                           chemin_json=CHEMIN_SORTIE_JSON, chemin_parquet=CHEMIN_SORTIE_PARQUET):
+    """
+    Écrit une copie de communes.json dont les indicateurs en % sont lissés (bayésien empirique)
+    vers la moyenne de leur département, pondérée par la population.
+
+    Args:
+        chemin_communes (str): Fichier JSON des communes {code_insee: {attribut: valeur}}.
+        colonnes (list): Indicateurs à lisser. None = les indicateurs en % du registre des variables
+            (variable_communes.json), comme le lissage en direct de l'application.
+        chemin_json (str): Fichier JSON de sortie (même format que communes.json).
+        chemin_parquet (str): Fichier Parquet de sortie.
+
+    Returns:
+        dict: Les communes avec leurs indicateurs lissés.
+    """
+    if colonnes is None:
+        colonnes = get_registry().colonnes_taux("communes")
+
+    with open(chemin_communes, 'r', encoding='utf-8') as f:
+        communes = json.load(f)
+
+    df = pd.DataFrame.from_dict(communes, orient='index')
+    df.index.name = 'code_insee'
+    df = lisser_communes(df.reset_index(), colonnes).set_index('code_insee')
+
+    # Retour au format {code_insee: {attribut: valeur}} (NaN -> null)
+    df = df.astype(object).where(df.notna(), None)
+    communes_lissees = df.to_dict(orient='index')
+
+    with open(chemin_json, 'w', encoding='utf-8') as f:
+        json.dump(communes_lissees, f, ensure_ascii=False, indent=4)
+    print(f"✅ Fichier des communes lissées créé : {chemin_json} ({len(communes_lissees)} communes)")
+
+    exporter_parquet(communes_lissees, chemin_parquet)
+    return communes_lissees
+
+
+if __name__ == "__main__":
+    creer_communes_lissees()
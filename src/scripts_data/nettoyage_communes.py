@@ -1,6 +1,7 @@
 import json
 import os
 import re
+from fusion_json import exporter_parquet
 
 # Codes INSEE des communes principales
 CODES_COMMUNES_PRINCIPALES = {
@@ -235,6 +236,9 @@ def executer_nettoyage_complet(chemin_entree: str = 'data/communes.json',
         print("✅ Sauvegarde réussie.")
     except IOError as e:
         print(f"❌ Erreur lors de la sauvegarde du fichier : {e}")
+
+    # --- 7. Export Parquet (lu en priorité par load_data) ---
+    exporter_parquet(communes, os.path.splitext(chemin_sortie)[0] + '.parquet')
         
     return communes
 
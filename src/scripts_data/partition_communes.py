@@ -0,0 +1,80 @@
+import pandas as pd
+import json
+import os
+
+# Définition des chemins
+CHEMIN_COMMUNES = "data/communes.parquet"
+DOSSIER_SORTIE = "data/communes_departements"
+NOM_INDEX = "index.json"
+
+
+def code_departement(codes_insee):
+    """
+    Extrait le code département à partir des codes INSEE des communes.
+    Les deux premiers caractères suffisent en métropole, y compris pour la Corse
+    dont les codes communes commencent par '2A' ou '2B'.
+
+    Args:
+        codes_insee (pd.Series): Codes INSEE des communes (5 caractères).
+
+    Returns:
+        pd.Series: Codes département sur 2 caractères.
+    """
+    return codes_insee.astype(str).str.zfill(5).str[:2].str.upper()
+
+
+def partitionner_communes(chemin_communes=CHEMIN_COMMUNES, dossier_sortie=DOSSIER_SORTIE):
+    """
+    Découpe la table des communes en un fichier Parquet par département et écrit
+    un index JSON {code_dep: {fichier, nb_communes, bbox, centroide}}.
+    La bbox est [lon_min, lat_min, lon_max, lat_max] et le centroïde [lon, lat].
+
+    Args:
+        chemin_communes (str): Chemin de la table des communes (Parquet ou JSON).
+        dossier_sortie (str): Dossier dans lequel écrire les partitions.
+
+    Returns:
+        dict: L'index des partitions.
+    """
+    if not os.path.exists(chemin_communes):
+        print(f"❌ Fichier non trouvé : {chemin_communes}")
+        return {}
+
+    if chemin_communes.endswith(".parquet"):
+        df = pd.read_parquet(chemin_communes)
+    else:
+        with open(chemin_communes, 'r', encoding='utf-8') as f:
+            df = pd.DataFrame.from_dict(json.load(f), orient="index")
+        df.index.name = "code_insee"
+        df = df.reset_index()
+
+    print(f"-> {len(df)} communes chargées depuis {chemin_communes}")
+
+    os.makedirs(dossier_sortie, exist_ok=True)
+    df["code_insee"] = df["code_insee"].astype(str).str.zfill(5)
+    codes_dep = code_departement(df["code_insee"])
+
+    index = {}
+    for code_dep, df_dep in df.groupby(codes_dep, sort=True):
+        df_dep = df_dep.sort_values("code_insee").reset_index(drop=True)
+        nom_fichier = f"{code_dep}.parquet"
+        df_dep.to_parquet(os.path.join(dossier_sortie, nom_fichier), index=False)
+
+        infos = {"fichier": nom_fichier, "nb_communes": len(df_dep), "bbox": None, "centroide": None}
+        if {"lon", "lat"}.issubset(df_dep.columns) and df_dep[["lon", "lat"]].notna().all(axis=1).any():
+            lon = df_dep["lon"].astype(float)
+            lat = df_dep["lat"].astype(float)
+            infos["bbox"] = [round(lon.min(), 5), round(lat.min(), 5), round(lon.max(), 5), round(lat.max(), 5)]
+            infos["centroide"] = [round(lon.mean(), 5), round(lat.mean(), 5)]
+        index[code_dep] = infos
+
+    chemin_index = os.path.join(dossier_sortie, NOM_INDEX)
+    with open(chemin_index, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=4)
+
+    print(f"✅ {len(index)} partitions écrites dans {dossier_sortie} (index : {chemin_index})")
+    return index
+
+
+if __name__ == "__main__":
+    partitionner_communes()
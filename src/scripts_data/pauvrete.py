@@ -2,6 +2,8 @@ import pandas as pd
 import json
 import os # Utile pour gérer les chemins et vérifier l'existence du dossier de sortie
 
+from cache_excel import lire_excel, lire_excels
+
 ## -----------------------------------------------------------
 ## Fonctions de Traitement et de Calcul (Retournent un dictionnaire)
 ## -----------------------------------------------------------
@@ -12,22 +14,23 @@ def calculer_taux_commune(chemin_taux_pauvrete, chemin_composition_communale):
     avec le taux de pauvreté de leur bassin de vie, au format demandé.
     Clé : CODGEO | Valeur : {"tx_pauvrete": xxx}
     """
-    # 1. Charger et préparer les données de taux de pauvreté (par BV2022)
+    # Lecture des deux classeurs en parallèle (ou depuis le cache Parquet s'ils n'ont pas changé)
     # Note: `header` doit être spécifié si les en-têtes ne sont pas à la ligne 0
-    df_taux = pd.read_excel(
-        chemin_taux_pauvrete,
-        usecols=['Code', 'Taux de pauvreté 2021']
-    ).rename(columns={
+    df_taux, df_composition = lire_excels([
+        (chemin_taux_pauvrete, {'usecols': ['Code', 'Taux de pauvreté 2021']}),
+        (chemin_composition_communale, {'usecols': ['CODGEO', 'BV2022', 'DEP']}),
+    ])
+    if df_taux is None or df_composition is None:
+        raise FileNotFoundError(f"Lecture impossible de {chemin_taux_pauvrete} ou {chemin_composition_communale}")
+
+    # 1. Préparer les données de taux de pauvreté (par BV2022)
+    df_taux = df_taux.rename(columns={
         'Code': 'BV2022',
         'Taux de pauvreté 2021': 'tx_pauvrete'
     })
     df_taux['BV2022'] = df_taux['BV2022'].astype(str).str.zfill(5)
 
-    # 2. Charger, préparer et filtrer les données de composition communale (Métropole)
-    df_composition = pd.read_excel(
-        chemin_composition_communale,
-        usecols=['CODGEO', 'BV2022', 'DEP']
-    )
+    # 2. Préparer et filtrer les données de composition communale (Métropole)
 
     df_composition['CODGEO'] = df_composition['CODGEO'].astype(str).str.zfill(5)
     df_composition['BV2022'] = df_composition['BV2022'].astype(str).str.zfill(5)
@@ -68,7 +71,7 @@ def calculer_taux_departement(chemin_excel):
     Charge le fichier Excel de taux de pauvreté par département et retourne le dictionnaire.
     Clé : DEP | Valeur : {"tx_pauvrete": xxx}
     """
-    df = pd.read_excel(
+    df = lire_excel(
         chemin_excel,
         usecols=['Code', 'Libellé', 'Taux de pauvreté 2021']
     ).rename(columns={
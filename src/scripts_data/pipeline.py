@@ -0,0 +1,536 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from ingestion_csv import SPECS
+
+# Définition des chemins
+DOSSIER_SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+CHEMIN_MANIFESTE = "data/.pipeline_manifest.json"
+
+# ===========================
+# Déclaration des étapes (graphe de dépendances)
+# ===========================
+
+# Une étape = un script de src/scripts_data, exécuté comme en ligne de commande (ou une de ses fonctions),
+# avec les fichiers qu'il lit (entrees) et ceux qu'il écrit (sorties ; un dossier est accepté).
+# Une étape dépend de la dernière étape déclarée AVANT elle qui écrit l'un de ses fichiers d'entrée :
+# l'ordre de la liste compte donc pour les scripts qui réécrivent un fichier sur place (communes.json).
+# Les étapes qui écrivent un même fichier sont exécutées ensemble, dans l'ordre, comme une seule étape
+# (voir regrouper_reecritures).
+ETAPES = [
+    {
+        "nom": "apl",
+        "script": "APL_loader.py",
+        "entrees": [f"data/APL/{fichier}" for fichier in (
+            "APL_chirurgiens_dentistes.xlsx", "APL_sages_femmes.xlsx", "APL_medecins_generalistes.xlsx",
+            "APL_infirmieres.xlsx", "APL_kinesitherapeutes.xlsx",
+        )],
+        "sorties": ["data/APL/processed/apl_communes.json", "data/APL/processed/apl_departements.json"],
+    },
+    {
+        "nom": "pauvrete",
+        "script": "pauvrete.py",
+        "entrees": ["data/tx_pauvrete/taux_pauvrete.xlsx", "data/tx_pauvrete/BV2022.xlsx",
+                    "data/tx_pauvrete/taux_pauvrete_dep.xlsx"],
+        "sorties": ["data/tx_pauvrete/tx_pauvrete_communes.json", "data/tx_pauvrete/tx_pauvrete_departements.json"],
+    },
+] + [
+    {
+        "nom": nom,
+        "script": "ingestion_csv.py",
+        "arguments": [nom],
+        "entrees": [spec["fichier"]],
+        "sorties": [spec["sortie"], os.path.splitext(spec["sortie"])[0] + ".parquet"],
+    }
+    for nom, spec in SPECS.items()
+] + [
+    {
+        "nom": "fusion_communes",
+        "script": "fusion_json.py",
+        "fonction": "fusionner_communes_json",
+        "entrees": [
+            "data/APL/processed/apl_communes.json",
+            "data/tx_pauvrete/tx_pauvrete_communes.json",
+        ] + [spec["sortie"] for spec in SPECS.values() if spec["sortie"].endswith("communes.json")],
+        "sorties": ["data/communes.json", "data/communes.parquet"],
+    },
+    {
+        "nom": "positions_communes",
+        "script": "positions_communes.py",
+        "entrees": ["data/communes.json", "data/communes.gpkg"],
+        "sorties": ["data/communes.json", "data/communes.parquet"],
+    },
+    {
+        "nom": "nettoyage_communes",
+        "script": "nettoyage_communes.py",
+        "entrees": ["data/communes.json"],
+        "sorties": ["data/communes.json", "data/communes.parquet"],
+    },
+    {
+        "nom": "fedi_departements",
+        "script": "fedi_departements.py",
+        "entrees": ["data/fedi/fedi.csv", "data/communes.json"],
+        "sorties": ["data/fedi/fedi_departements.json"],
+    },
+    {
+        "nom": "fusion_departements",
+        "script": "fusion_json.py",
+        "fonction": "fusionner_departements_json",
+        "entrees": [
+            "data/APL/processed/apl_departements.json",
+            "data/tx_pauvrete/tx_pauvrete_departements.json",
+            "data/fedi/fedi_departements.json",
+        ] + [spec["sortie"] for spec in SPECS.values() if spec["sortie"].endswith("departements.json")],
+        "sorties": ["data/departements.json", "data/departements.parquet"],
+    },
+    {
+        "nom": "creation_json_variable",
+        "script": "creation_json_variable.py",
+        "entrees": ["data/communes.json", "data/departements.json"],
+        "sorties": ["data/variable_communes.json", "data/variable_departements.json"],
+    },
+    {
+        "nom": "partition_communes",
+        "script": "partition_communes.py",
+        "entrees": ["data/communes.parquet"],
+        "sorties": ["data/communes_departements"],
+    },
+    {
+        "nom": "lissage_communes",
+        "script": "lissage_communes.py",
+        "entrees": ["data/communes.json", "data/variable_communes.json"],
+        "sorties": ["data/communes_lissees.json", "data/communes_lissees.parquet"],
+    },
+    {
+        "nom": "geometrie_departements",
+        "script": "geometrie_departements.py",
+        "entrees": ["data/departements_polygon.geojson"],
+        "sorties": ["data/departements_geometrie.parquet"],
+    },
+    {
+        "nom": "geometrie_communes",
+        "script": "geometrie_communes.py",
+        "entrees": ["data/communes.gpkg"],
+        "sorties": ["data/communes_geometrie"],
+    },
+    {
+        "nom": "tuiles_vectorielles",
+        "script": "tuiles_vectorielles.py",
+        "entrees": ["data/departements_geometrie.parquet", "data/communes_geometrie",
+                    "data/departements.parquet", "data/communes.parquet"],
+        "sorties": ["static/tiles"],
+    },
+]
+
+
+def producteurs_entrees(etapes):
+    """
+    Pour chaque étape et chacun de ses fichiers d'entrée, la dernière étape déclarée avant elle
+    qui écrit ce fichier (absente pour une donnée brute).
+
+    Returns:
+        dict: {nom_etape: {chemin: nom de l'étape productrice}}
+    """
+    dernier_producteur = {}
+    producteurs = {}
+    for etape in etapes:
+        producteurs[etape["nom"]] = {chemin: dernier_producteur[chemin] for chemin in etape["entrees"]
+                                     if chemin in dernier_producteur}
+        for chemin in etape["sorties"]:
+            dernier_producteur[chemin] = etape["nom"]
+    return producteurs
+
+
+def regrouper_reecritures(etapes):
+    """
+    Regroupe en une seule étape les étapes qui écrivent un même fichier (ex : communes.json, écrit par
+    fusion_communes puis réécrit sur place par positions_communes et nettoyage_communes).
+
+    Sur le disque, un tel fichier ne contient que la version du dernier auteur : relancer seul un auteur
+    intermédiaire lui ferait relire sa propre sortie (ex : un nettoyage appliqué deux fois). Le groupe
+    est donc à jour ou relancé en entier, depuis son premier auteur. Les autres étapes ne voient que
+    la version finale des fichiers du groupe.
+
+    Returns:
+        tuple: (étapes regroupées dans l'ordre de déclaration,
+                {nom d'origine: nom de l'étape regroupée},
+                {nom de l'étape regroupée: {chemin: étape productrice}} (voir producteurs_entrees))
+    """
+    # Union des auteurs de chaque fichier (un groupe peut couvrir plusieurs fichiers)
+    parent = {etape["nom"]: etape["nom"] for etape in etapes}
+
+    def _racine(nom):
+        while parent[nom] != nom:
+            nom = parent[nom]
+        return nom
+
+    ecrivains = {}
+    for etape in etapes:
+        for chemin in etape["sorties"]:
+            ecrivains.setdefault(chemin, []).append(etape["nom"])
+    for noms in ecrivains.values():
+        for nom in noms[1:]:
+            parent[_racine(nom)] = _racine(noms[0])
+
+    membres = {}
+    for etape in etapes:
+        membres.setdefault(_racine(etape["nom"]), []).append(etape)
+
+    regroupees, renommage = [], {}
+    for etape in etapes:
+        groupe = membres[_racine(etape["nom"])]
+        if len(groupe) == 1:
+            regroupees.append(etape)
+            renommage[etape["nom"]] = etape["nom"]
+        elif etape is groupe[0]:
+            nom = "+".join(membre["nom"] for membre in groupe)
+            entrees, produits = [], set()
+            for membre in groupe:
+                entrees += [c for c in membre["entrees"] if c not in produits and c not in entrees]
+                produits.update(membre["sorties"])
+            sorties = list(dict.fromkeys(c for membre in groupe for c in membre["sorties"]))
+            regroupees.append({"nom": nom, "sous_etapes": groupe, "entrees": entrees, "sorties": sorties})
+            renommage.update({membre["nom"]: nom for membre in groupe})
+
+    # Producteurs calculés sur les étapes d'origine (ordre de déclaration), hors du groupe lui-même
+    producteurs = {etape["nom"]: {} for etape in regroupees}
+    for nom, entrees in producteurs_entrees(etapes).items():
+        producteurs[renommage[nom]].update({chemin: renommage[producteur] for chemin, producteur in entrees.items()
+                                            if renommage[producteur] != renommage[nom]})
+    return regroupees, renommage, producteurs
+
+
+def calculer_dependances(producteurs):
+    """
+    Associe à chaque étape les étapes dont elle lit les sorties.
+
+    Args:
+        producteurs (dict): Producteurs des entrées de chaque étape (voir producteurs_entrees).
+
+    Returns:
+        dict: {nom_etape: set(noms des étapes prérequises)}
+    """
+    return {nom: set(entrees.values()) for nom, entrees in producteurs.items()}
+
+
+def sources_externes(etapes):
+    """Fichiers lus par les étapes sans être produits par aucune d'elles (données brutes)."""
+    produits = {chemin for etape in etapes for chemin in etape["sorties"]}
+    return {chemin for etape in etapes for chemin in etape["entrees"] if chemin not in produits}
+
+
+def selectionner(etapes, cibles, dependances):
+    """Restreint les étapes aux cibles demandées et à tout ce dont elles dépendent (ordre conservé)."""
+    a_garder, pile = set(), list(cibles)
+    while pile:
+        nom = pile.pop()
+        if nom not in a_garder:
+            a_garder.add(nom)
+            pile.extend(dependances[nom])
+    return [etape for etape in etapes if etape["nom"] in a_garder]
+
+
+# ===========================
+# Manifeste des empreintes (reconstructions incrémentales)
+# ===========================
+
+# Manifeste : empreintes SHA-256 des fichiers (avec taille et date de modification, pour ne pas
+# relire un fichier inchangé) et, pour chaque étape exécutée, la signature de son script et
+# les empreintes de ses entrées et de ses sorties au moment de son exécution.
+def charger_manifeste(chemin=CHEMIN_MANIFESTE):
+    """Charge le manifeste (vide s'il n'existe pas ou est illisible)."""
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            manifeste = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"fichiers": {}, "etapes": {}}
+    manifeste.setdefault("fichiers", {})
+    manifeste.setdefault("etapes", {})
+    return manifeste
+
+
+def sauvegarder_manifeste(manifeste, chemin=CHEMIN_MANIFESTE):
+    """Écrit le manifeste de façon atomique (fichier temporaire puis remplacement)."""
+    temporaire = chemin + ".tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=4, ensure_ascii=False)
+    os.replace(temporaire, chemin)
+
+
+def empreinte_fichier(chemin, cache):
+    """SHA-256 d'un fichier, relu seulement si sa taille ou sa date de modification a changé."""
+    infos = os.stat(chemin)
+    connu = cache.get(chemin)
+    if connu and connu["taille"] == infos.st_size and connu["mtime_ns"] == infos.st_mtime_ns:
+        return connu["sha256"]
+    with open(chemin, 'rb') as f:
+        sha = hashlib.file_digest(f, "sha256").hexdigest()
+    cache[chemin] = {"taille": infos.st_size, "mtime_ns": infos.st_mtime_ns, "sha256": sha}
+    return sha
+
+
+def empreinte(chemin, cache):
+    """
+    Empreinte d'un fichier ou d'un dossier (chemins relatifs et empreintes de tous ses fichiers).
+
+    Returns:
+        str: SHA-256 hexadécimal, None si le chemin n'existe pas.
+    """
+    if os.path.isfile(chemin):
+        return empreinte_fichier(chemin, cache)
+    if not os.path.isdir(chemin):
+        return None
+    sha = hashlib.sha256()
+    for dossier, sous_dossiers, fichiers in os.walk(chemin):
+        sous_dossiers.sort()
+        for nom in sorted(fichiers):
+            fichier = os.path.join(dossier, nom)
+            sha.update(f"{os.path.relpath(fichier, chemin)}\0{empreinte_fichier(fichier, cache)}\n".encode())
+    return sha.hexdigest()
+
+
+def signature_etape(etape):
+    """Empreinte de ce que l'étape exécute : contenu du script, fonction appelée et arguments."""
+    if "sous_etapes" in etape:
+        return hashlib.sha256("".join(signature_etape(membre) for membre in etape["sous_etapes"]).encode()).hexdigest()
+    with open(os.path.join(DOSSIER_SCRIPTS, etape["script"]), 'rb') as f:
+        sha = hashlib.sha256(f.read())
+    sha.update(json.dumps([etape.get("fonction"), list(etape.get("arguments", ()))]).encode())
+    return sha.hexdigest()
+
+
+def est_a_jour(etape, manifeste, producteurs):
+    """
+    Indique si l'étape peut être sautée : même script, mêmes entrées qu'à sa dernière exécution,
+    et sorties toujours présentes et non modifiées depuis.
+
+    Une entrée produite par une autre étape est comparée à l'empreinte enregistrée par cette étape
+    à sa dernière exécution. Chaque fichier n'a qu'un auteur une fois les réécritures sur place
+    regroupées (voir regrouper_reecritures) : toute sortie modifiée à la main relance son auteur.
+
+    Args:
+        etape (dict): Étape déclarée (ou groupe d'étapes).
+        manifeste (dict): Manifeste chargé (voir charger_manifeste).
+        producteurs (dict): {chemin: étape productrice} des entrées de l'étape.
+
+    Returns:
+        bool: True si l'étape est à jour.
+    """
+    trace = manifeste["etapes"].get(etape["nom"])
+    if not trace or trace["signature"] != signature_etape(etape):
+        return False
+
+    for chemin in etape["entrees"]:
+        attendue = None
+        if chemin in producteurs:
+            attendue = manifeste["etapes"].get(producteurs[chemin], {}).get("sorties", {}).get(chemin)
+        if attendue is None:
+            attendue = empreinte(chemin, manifeste["fichiers"])
+        if trace["entrees"].get(chemin) != attendue:
+            return False
+
+    for chemin in etape["sorties"]:
+        if not os.path.exists(chemin) or empreinte(chemin, manifeste["fichiers"]) != trace["sorties"].get(chemin):
+            return False
+    return True
+
+
+# ===========================
+# Exécution d'une étape (dans un processus du pool)
+# ===========================
+
+def executer_etape(script, fonction=None, arguments=()):
+    """
+    Exécute un script de src/scripts_data comme `python src/scripts_data/<script> <arguments>`,
+    ou appelle seulement l'une de ses fonctions. La sortie console est capturée pour être
+    affichée d'un bloc (les étapes parallèles ne s'entremêlent pas).
+
+    Returns:
+        tuple: (succès: bool, sortie console: str, durée en secondes: float)
+    """
+    # Les scripts importent leurs voisins directement (ex : from fusion_json import ...)
+    if DOSSIER_SCRIPTS not in sys.path:
+        sys.path.insert(0, DOSSIER_SCRIPTS)
+    chemin = os.path.join(DOSSIER_SCRIPTS, script)
+
+    sortie = io.StringIO()
+    debut = time.perf_counter()
+    succes = True
+    with contextlib.redirect_stdout(sortie), contextlib.redirect_stderr(sortie):
+        argv = sys.argv
+        try:
+            if fonction:
+                runpy.run_path(chemin, run_name="etape")[fonction](*arguments)
+            else:
+                sys.argv = [chemin, *arguments]
+                runpy.run_path(chemin, run_name="__main__")
+        except SystemExit as e:
+            succes = e.code in (None, 0)
+        except Exception:
+            traceback.print_exc()
+            succes = False
+        finally:
+            sys.argv = argv
+    return succes, sortie.getvalue(), time.perf_counter() - debut
+
+
+def executer_etapes(commandes):
+    """
+    Exécute à la suite plusieurs étapes d'un même groupe (voir regrouper_reecritures),
+    en s'arrêtant à la première en échec.
+
+    Args:
+        commandes (list): [(script, fonction, arguments), ...] dans l'ordre d'exécution.
+
+    Returns:
+        tuple: (succès: bool, sortie console: str, durée en secondes: float)
+    """
+    sorties, duree = [], 0.0
+    for script, fonction, arguments in commandes:
+        succes, sortie, duree_etape = executer_etape(script, fonction, arguments)
+        duree += duree_etape
+        sorties.append(f"[{script}]\n{sortie}" if len(commandes) > 1 else sortie)
+        if not succes:
+            return False, "".join(sorties), duree
+    return True, "".join(sorties), duree
+
+
+# ===========================
+# Ordonnancement
+# ===========================
+
+def executer_pipeline(etapes=ETAPES, cibles=None, nb_workers=None, force=False,
+                      chemin_manifeste=CHEMIN_MANIFESTE):
+    """
+    Exécute les étapes en parallèle dans un pool de processus : chaque étape démarre dès que
+    toutes celles dont elle lit les sorties sont terminées.
+
+    Une étape dont le script et les entrées n'ont pas changé depuis sa dernière exécution
+    (voir le manifeste) est sautée et ses sorties sont réutilisées : après la mise à jour d'une
+    source, seules les étapes qui en dépendent sont relancées.
+
+    Une étape dont une donnée brute manque est ignorée si ses sorties existent déjà (elles sont
+    réutilisées). Une étape en échec (exception, ou sortie déclarée absente après exécution)
+    annule toutes celles qui en dépendent ; les branches indépendantes continuent.
+
+    Args:
+        etapes (list): Étapes déclarées (voir ETAPES).
+        cibles (list): Noms des étapes à produire (avec leurs prérequis). None = toutes.
+        nb_workers (int): Nombre de processus (None = nombre de cœurs).
+        force (bool): Réexécute toutes les étapes, même à jour.
+        chemin_manifeste (str): Fichier du manifeste des empreintes.
+
+    Returns:
+        dict: {nom_etape: "ok" | "à jour" | "ignorée" | "échec" | "annulée"} (une entrée par groupe
+        d'étapes qui écrivent un même fichier, nommé "etape1+etape2+...")
+    """
+    etapes, renommage, producteurs = regrouper_reecritures(etapes)
+    dependances = calculer_dependances(producteurs)
+    externes = sources_externes(etapes)
+    if cibles:
+        inconnues = [nom for nom in cibles if nom not in renommage and nom not in dependances]
+        if inconnues:
+            raise KeyError(f"Étape(s) inconnue(s) : {inconnues}. Étapes disponibles : {list(renommage)}")
+        etapes = selectionner(etapes, [renommage.get(nom, nom) for nom in cibles], dependances)
+    par_nom = {etape["nom"]: etape for etape in etapes}
+    manifeste = charger_manifeste(chemin_manifeste)
+
+    statuts = {}
+    en_attente = dict.fromkeys(par_nom)
+    en_cours = {}
+    nb_workers = nb_workers or os.cpu_count() or 1
+    debut = time.perf_counter()
+    print(f"🔄 Pipeline : {len(par_nom)} étapes sur {nb_workers} processus")
+
+    def _terminer(nom, statut):
+        statuts[nom] = statut
+        if statut in ("échec", "annulée"):
+            # Propagation de l'échec à toutes les étapes en aval
+            for autre in list(en_attente):
+                if nom in dependances[autre] and autre in en_attente:
+                    del en_attente[autre]
+                    print(f"⚠️  {autre} : annulée ({nom} en échec)")
+                    _terminer(autre, "annulée")
+
+    with ProcessPoolExecutor(max_workers=nb_workers) as pool:
+        while en_attente or en_cours:
+            nb_terminees = len(statuts)
+            # Lancement de toutes les étapes dont les prérequis sont terminés
+            for nom in list(en_attente):
+                prerequis = dependances[nom] & par_nom.keys()
+                if not all(statuts.get(p) in ("ok", "à jour", "ignorée") for p in prerequis):
+                    continue
+                del en_attente[nom]
+                etape = par_nom[nom]
+
+                manquantes = [c for c in etape["entrees"] if c in externes and not os.path.exists(c)]
+                if manquantes:
+                    if all(os.path.exists(c) for c in etape["sorties"]):
+                        print(f"♻️  {nom} : source(s) absente(s) {manquantes}, sorties existantes réutilisées")
+                        _terminer(nom, "ignorée")
+                    else:
+                        print(f"❌ {nom} : source(s) absente(s) {manquantes}")
+                        _terminer(nom, "échec")
+                    continue
+
+                if not force and est_a_jour(etape, manifeste, producteurs[nom]):
+                    print(f"♻️  {nom} : à jour (script et entrées inchangés)")
+                    _terminer(nom, "à jour")
+                    continue
+
+                # Empreintes des entrées telles que l'étape va les lire
+                entrees = {c: empreinte(c, manifeste["fichiers"]) for c in etape["entrees"]}
+                commandes = [(membre["script"], membre.get("fonction"), tuple(membre.get("arguments", ())))
+                             for membre in etape.get("sous_etapes", [etape])]
+                futur = pool.submit(executer_etapes, commandes)
+                en_cours[futur] = (nom, entrees)
+
+            if not en_cours:
+                if en_attente and len(statuts) == nb_terminees:
+                    raise RuntimeError(f"Dépendances circulaires entre les étapes : {list(en_attente)}")
+                continue
+
+            termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for futur in termines:
+                nom, entrees = en_cours.pop(futur)
+                succes, sortie, duree = futur.result()
+                absentes = [c for c in par_nom[nom]["sorties"] if not os.path.exists(c)]
+                print(f"\n----- {nom} ({duree:.1f} s) -----\n{sortie.rstrip()}")
+                if succes and not absentes:
+                    manifeste["etapes"][nom] = {
+                        "signature": signature_etape(par_nom[nom]),
+                        "entrees": entrees,
+                        "sorties": {c: empreinte(c, manifeste["fichiers"]) for c in par_nom[nom]["sorties"]},
+                    }
+                    sauvegarder_manifeste(manifeste, chemin_manifeste)
+                    print(f"✅ {nom} terminée")
+                    _terminer(nom, "ok")
+                else:
+                    # Une étape en échec devra être réexécutée
+                    manifeste["etapes"].pop(nom, None)
+                    sauvegarder_manifeste(manifeste, chemin_manifeste)
+                    print(f"❌ {nom} en échec" + (f" (sorties absentes : {absentes})" if absentes else ""))
+                    _terminer(nom, "échec")
+
+    nb_ok = sum(statut == "ok" for statut in statuts.values())
+    nb_a_jour = sum(statut == "à jour" for statut in statuts.values())
+    print(f"\n✅ Pipeline terminé en {time.perf_counter() - debut:.1f} s : {nb_ok} étape(s) exécutée(s), "
+          f"{nb_a_jour} à jour, {len(statuts) - nb_ok - nb_a_jour} ignorée(s), annulée(s) ou en échec")
+    for nom, statut in statuts.items():
+        if statut not in ("ok", "à jour"):
+            print(f"   - {nom} : {statut}")
+    return statuts
+
+
+if __name__ == "__main__":
+    # python src/scripts_data/pipeline.py [--force] [etape ...]   (depuis la racine du dépôt)
+    arguments = sys.argv[1:]
+    executer_pipeline(cibles=[a for a in arguments if a != "--force"] or None, force="--force" in arguments)
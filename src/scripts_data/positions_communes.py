@@ -3,13 +3,14 @@ import json
 import os
 import pandas as pd
 from shapely.geometry import mapping 
+from fusion_json import exporter_parquet
 
 CHEMIN_GPKG = "data/communes.gpkg" 
 
 def enrichir_communes_et_sauvegarder(chemin_json_communes, chemin_gpkg, layer_name='commune'):
     """
     Lit le JSON des communes, l'enrichit avec code postal, lat/lon du centroïde 
-    à partir du GeoPackage, puis réécrit le fichier JSON.
+    à partir du GeoPackage, puis réécrit le fichier JSON (et le Parquet du même nom, lu par l'application).
     """
     if not os.path.exists(chemin_json_communes):
         print(f"Fichier JSON non trouvé : {chemin_json_communes}")
@@ -64,6 +65,7 @@ def enrichir_communes_et_sauvegarder(chemin_json_communes, chemin_gpkg, layer_na
     # 5. Réécriture du fichier JSON
     with open(chemin_json_communes, 'w', encoding='utf-8') as f:
         json.dump(data_communes, f, indent=4, ensure_ascii=False)
+    exporter_parquet(data_communes, os.path.splitext(chemin_json_communes)[0] + '.parquet')
         
     print(f"Fichier JSON des communes mis à jour : {chemin_json_communes} ({count_enriched} entrées enrichies).")
     
@@ -72,7 +74,7 @@ def enrichir_communes_et_sauvegarder(chemin_json_communes, chemin_gpkg, layer_na
 def enrichir_departements_et_sauvegarder(chemin_json_deps, chemin_gpkg, layer_name='departement'):
     """
     Lit le JSON des départements, l'enrichit avec la géométrie GeoJSON 
-    à partir du GeoPackage, puis réécrit le fichier JSON.
+    à partir du GeoPackage, puis réécrit le fichier JSON (et le Parquet du même nom, lu par l'application).
     """
     if not os.path.exists(chemin_json_deps):
         print(f"Fichier JSON non trouvé : {chemin_json_deps}")
@@ -125,6 +127,7 @@ def enrichir_departements_et_sauvegarder(chemin_json_deps, chemin_gpkg, layer_na
     # Réécriture du fichier JSON
     with open(chemin_json_deps, 'w', encoding='utf-8') as f:
         json.dump(data_deps, f, indent=4, ensure_ascii=False)
+    exporter_parquet(data_deps, os.path.splitext(chemin_json_deps)[0] + '.parquet')
 
     print(f"Fichier JSON des départements mis à jour : {chemin_json_deps} ({count_enriched} entrées enrichies).")
 
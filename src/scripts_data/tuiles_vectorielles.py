@@ -0,0 +1,300 @@
+import geopandas as gpd
+import pandas as pd
+import numpy as np
+import shapely
+import json
+import glob
+import os
+
+# Définition des chemins
+CHEMIN_GEOMETRIE_DEPARTEMENTS = "data/departements_geometrie.parquet"
+DOSSIER_GEOMETRIE_COMMUNES = "data/communes_geometrie"
+CHEMIN_DEPARTEMENTS = "data/departements.parquet"
+CHEMIN_COMMUNES = "data/communes.parquet"
+DOSSIER_TUILES = "static/tiles"
+
+# Paramètres des tuiles Mapbox Vector Tile (MVT v2)
+EXTENT = 4096          # résolution interne d'une tuile
+MARGE = 64             # marge de découpe autour de la tuile (en unités de tuile)
+DEMI_MONDE = 20037508.342789244   # demi-largeur du monde en Web Mercator (mètres)
+
+# Couches produites : niveaux de détail disponibles (colonne -> tolérance en degrés),
+# plage de zooms et colonne du nom affiché dans le tooltip
+COUCHES = {
+    "departements": {
+        "niveaux": {"geometry": 0.02, "geometry_regional": 0.005, "geometry_departemental": 0.001},
+        "zooms": range(0, 10),
+        "nom": "nom_departement",
+    },
+    "communes": {
+        "niveaux": {"geometry_regional": 0.005, "geometry_departemental": 0.001},
+        "zooms": range(5, 11),
+        "nom": "nom_commune",
+    },
+}
+
+
+# ===========================
+# Encodage protobuf (sans dépendance)
+# ===========================
+
+def _varints(valeurs):
+    """Encode un tableau d'entiers positifs (< 2**35) en varints protobuf concaténés."""
+    valeurs = np.asarray(valeurs, dtype=np.uint64)
+    if valeurs.size == 0:
+        return b""
+    groupes = np.stack([(valeurs >> np.uint64(7 * i)) & np.uint64(0x7F) for i in range(5)], axis=1).astype(np.uint8)
+    longueurs = np.ones(len(valeurs), dtype=np.int64)
+    for i in range(1, 5):
+        longueurs += valeurs >= np.uint64(1 << (7 * i))
+    positions = np.arange(5)
+    utiles = positions[None, :] < longueurs[:, None]
+    suite = positions[None, :] < (longueurs - 1)[:, None]
+    groupes[suite] |= 0x80
+    return groupes[utiles].tobytes()
+
+
+def _champ_varint(numero, valeur):
+    return _varints([numero << 3, valeur])
+
+
+def _champ_octets(numero, octets):
+    return _varints([(numero << 3) | 2, len(octets)]) + octets
+
+
+def _zigzag(valeurs):
+    valeurs = np.asarray(valeurs, dtype=np.int64)
+    return ((valeurs << 1) ^ (valeurs >> 63)).astype(np.uint64)
+
+
+def encoder_geometrie(anneaux):
+    """
+    Encode une liste d'anneaux (tableaux entiers (k, 2), non fermés, déjà orientés)
+    en commandes MVT : MoveTo, LineTo, ClosePath avec deltas zigzag.
+    """
+    commandes = []
+    curseur = np.zeros(2, dtype=np.int64)
+    for anneau in anneaux:
+        deltas = np.diff(np.vstack([curseur, anneau]), axis=0)
+        curseur = anneau[-1]
+        zz = _zigzag(deltas).reshape(-1)
+        commandes.append(np.array([(1 << 3) | 1], dtype=np.uint64))             # MoveTo(1)
+        commandes.append(zz[:2])
+        commandes.append(np.array([((len(anneau) - 1) << 3) | 2], dtype=np.uint64))  # LineTo(k-1)
+        commandes.append(zz[2:])
+        commandes.append(np.array([(1 << 3) | 7], dtype=np.uint64))             # ClosePath
+    return np.concatenate(commandes) if commandes else np.empty(0, dtype=np.uint64)
+
+
+def encoder_tuile(nom_couche, features):
+    """
+    Encode une couche MVT.
+
+    Args:
+        nom_couche (str): Nom de la couche.
+        features (list): [(idx, {propriété: valeur}, commandes_geometrie), ...]
+
+    Returns:
+        bytes: Le contenu de la tuile (.pbf).
+    """
+    cles, valeurs, index_cles, index_valeurs = [], [], {}, {}
+    corps_features = []
+    for idx, proprietes, commandes in features:
+        tags = []
+        for cle, valeur in proprietes.items():
+            if cle not in index_cles:
+                index_cles[cle] = len(cles)
+                cles.append(cle)
+            if (type(valeur), valeur) not in index_valeurs:
+                index_valeurs[(type(valeur), valeur)] = len(valeurs)
+                valeurs.append(valeur)
+            tags += [index_cles[cle], index_valeurs[(type(valeur), valeur)]]
+
+        corps = _champ_varint(1, idx)
+        corps += _champ_octets(2, _varints(tags))
+        corps += _champ_varint(3, 3)                      # POLYGON
+        corps += _champ_octets(4, _varints(commandes))
+        corps_features.append(_champ_octets(2, corps))
+
+    couche = _champ_octets(1, nom_couche.encode("utf-8"))
+    couche += b"".join(corps_features)
+    couche += b"".join(_champ_octets(3, c.encode("utf-8")) for c in cles)
+    for valeur in valeurs:
+        if isinstance(valeur, str):
+            couche += _champ_octets(4, _champ_octets(1, valeur.encode("utf-8")))
+        else:
+            couche += _champ_octets(4, _champ_varint(5, int(valeur)))
+    couche += _champ_varint(5, EXTENT)
+    couche += _champ_varint(15, 2)
+    return _champ_octets(3, couche)
+
+
+# ===========================
+# Découpage en tuiles
+# ===========================
+
+def aire_signee(anneau):
+    """Aire signée (formule du géomètre) dans le repère de la tuile (y vers le bas)."""
+    x, y = anneau[:, 0], anneau[:, 1]
+    return (np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+
+
+def anneaux_tuile(geometrie, xmin, ymax, taille):
+    """
+    Convertit une géométrie (Web Mercator, déjà découpée) en anneaux entiers dans le repère
+    de la tuile, orientés selon la spécification MVT (extérieur > 0, trous < 0).
+    """
+    anneaux = []
+    for polygone in shapely.get_parts(geometrie):
+        if not isinstance(polygone, shapely.Polygon) or polygone.is_empty:
+            continue
+        for numero, anneau in enumerate([polygone.exterior] + list(polygone.interiors)):
+            coords = shapely.get_coordinates(anneau)
+            points = np.empty((len(coords), 2), dtype=np.int64)
+            points[:, 0] = np.round((coords[:, 0] - xmin) / taille * EXTENT)
+            points[:, 1] = np.round((ymax - coords[:, 1]) / taille * EXTENT)
+
+            # Supprime les points répétés après arrondi et le point de fermeture
+            garder = np.r_[True, np.any(points[1:] != points[:-1], axis=1)]
+            points = points[garder]
+            if len(points) > 1 and (points[0] == points[-1]).all():
+                points = points[:-1]
+            if len(points) < 3:
+                if numero == 0:
+                    break   # extérieur dégénéré : polygone ignoré
+                continue
+
+            aire = aire_signee(points)
+            if aire == 0:
+                if numero == 0:
+                    break
+                continue
+            if (numero == 0) != (aire > 0):
+                points = points[::-1]
+            anneaux.append(points)
+    return anneaux
+
+
+def choisir_niveau(niveaux, zoom):
+    """Niveau de détail le plus grossier dont la tolérance reste sous la taille d'un pixel."""
+    taille_pixel = 360 / (256 * 2 ** zoom)
+    tries = sorted(niveaux.items(), key=lambda x: -x[1])
+    for colonne, tolerance in tries:
+        if tolerance <= taille_pixel:
+            return colonne
+    return tries[-1][0]
+
+
+def generer_couche(gdf, nom_couche, niveaux, zooms, dossier_sortie):
+    """
+    Écrit la pyramide de tuiles d'une couche : {dossier}/{nom_couche}/{z}/{x}/{y}.pbf
+    et un fichier metadata.json (zooms, emprise, ordre des codes INSEE).
+
+    Chaque entité porte 'code_insee', 'idx' (sa position dans metadata['codes'],
+    qui sert à joindre les couleurs côté navigateur) et 'nom' si disponible.
+    """
+    dossier_couche = os.path.join(dossier_sortie, nom_couche)
+    os.makedirs(dossier_couche, exist_ok=True)
+
+    gdf = gdf.sort_values("code_insee").reset_index(drop=True)
+    codes = gdf["code_insee"].tolist()
+    noms = gdf["nom"].tolist() if "nom" in gdf.columns else None
+
+    niveaux = {c: t for c, t in niveaux.items() if c in gdf.columns}
+    mercator = {c: gpd.GeoSeries(gdf[c], crs=gdf[c].crs).to_crs(epsg=3857).values for c in niveaux}
+
+    nb_tuiles = 0
+    for z in zooms:
+        colonne = choisir_niveau(niveaux, z)
+        geometries = mercator[colonne]
+        arbre = shapely.STRtree(geometries)
+        taille = 2 * DEMI_MONDE / 2 ** z
+        marge = MARGE / EXTENT * taille
+
+        xmin_total, ymin_total, xmax_total, ymax_total = shapely.total_bounds(geometries)
+        tx_min = int((xmin_total + DEMI_MONDE) // taille)
+        tx_max = int((xmax_total + DEMI_MONDE) // taille)
+        ty_min = int((DEMI_MONDE - ymax_total) // taille)
+        ty_max = int((DEMI_MONDE - ymin_total) // taille)
+
+        for tx in range(tx_min, tx_max + 1):
+            for ty in range(ty_min, ty_max + 1):
+                xmin = -DEMI_MONDE + tx * taille
+                ymax = DEMI_MONDE - ty * taille
+                cadre = (xmin - marge, ymax - taille - marge, xmin + taille + marge, ymax + marge)
+
+                candidats = arbre.query(shapely.box(*cadre), predicate="intersects")
+                if len(candidats) == 0:
+                    continue
+
+                decoupes = shapely.clip_by_rect(geometries[candidats], *cadre)
+                features = []
+                for i, geometrie in zip(candidats, decoupes):
+                    anneaux = anneaux_tuile(geometrie, xmin, ymax, taille)
+                    if not anneaux:
+                        continue
+                    proprietes = {"code_insee": codes[i], "idx": int(i)}
+                    if noms is not None and isinstance(noms[i], str):
+                        proprietes["nom"] = noms[i]
+                    features.append((int(i), proprietes, encoder_geometrie(anneaux)))
+
+                if not features:
+                    continue
+                dossier_tuile = os.path.join(dossier_couche, str(z), str(tx))
+                os.makedirs(dossier_tuile, exist_ok=True)
+                with open(os.path.join(dossier_tuile, f"{ty}.pbf"), "wb") as f:
+                    f.write(encoder_tuile(nom_couche, features))
+                nb_tuiles += 1
+
+        print(f"-> {nom_couche} z{z} : niveau '{colonne}', tuiles écrites jusqu'ici : {nb_tuiles}")
+
+    emprise = gpd.GeoSeries(gdf[list(niveaux)[0]]).to_crs(epsg=4326).total_bounds
+    metadata = {
+        "couche": nom_couche,
+        "minzoom": min(zooms),
+        "maxzoom": max(zooms),
+        "bounds": [round(float(v), 5) for v in emprise],
+        "champs": ["code_insee", "idx"] + (["nom"] if noms is not None else []),
+        "codes": codes,
+    }
+    with open(os.path.join(dossier_couche, "metadata.json"), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+    print(f"✅ Couche '{nom_couche}' : {nb_tuiles} tuiles dans {dossier_couche}")
+    return metadata
+
+
+def ajouter_noms(gdf, chemin_table, colonne_nom):
+    """Ajoute la colonne 'nom' à partir de la table Parquet des données (si disponible)."""
+    if not os.path.exists(chemin_table):
+        return gdf
+    table = pd.read_parquet(chemin_table, columns=["code_insee", colonne_nom])
+    table["code_insee"] = table["code_insee"].astype(str)
+    noms = table.set_index("code_insee")[colonne_nom].rename("nom")
+    return gdf.join(noms, on="code_insee")
+
+
+def creer_tuiles(dossier_sortie=DOSSIER_TUILES):
+    """
+    Produit les tuiles vectorielles des départements et des communes à partir des
+    GeoParquet de niveaux de détail (geometrie_departements.py, geometrie_communes.py).
+    """
+    if os.path.exists(CHEMIN_GEOMETRIE_DEPARTEMENTS):
+        gdf = gpd.read_parquet(CHEMIN_GEOMETRIE_DEPARTEMENTS)
+        gdf["code_insee"] = gdf["code_insee"].astype(str).str.zfill(2)
+        gdf = ajouter_noms(gdf, CHEMIN_DEPARTEMENTS, COUCHES["departements"]["nom"])
+        generer_couche(gdf, "departements", COUCHES["departements"]["niveaux"], COUCHES["departements"]["zooms"], dossier_sortie)
+    else:
+        print(f"❌ Fichier non trouvé : {CHEMIN_GEOMETRIE_DEPARTEMENTS}")
+
+    fichiers = sorted(glob.glob(os.path.join(DOSSIER_GEOMETRIE_COMMUNES, "*.parquet")))
+    if fichiers:
+        gdf = pd.concat([gpd.read_parquet(f) for f in fichiers], ignore_index=True)
+        gdf = ajouter_noms(gdf, CHEMIN_COMMUNES, COUCHES["communes"]["nom"])
+        generer_couche(gdf, "communes", COUCHES["communes"]["niveaux"], COUCHES["communes"]["zooms"], dossier_sortie)
+    else:
+        print(f"❌ Aucun fichier trouvé dans : {DOSSIER_GEOMETRIE_COMMUNES}")
+
+
+if __name__ == "__main__":
+    creer_tuiles()
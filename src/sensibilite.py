@@ -0,0 +1,153 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.ranking import rangs
+from src.scenarios import _calculer_scenarios
+from src.variables import TAILLE_CLASSEMENT
+
+# ===========================
+# Sensibilité des classements aux pondérations (Monte Carlo)
+# ===========================
+
+# Moteur de scores de chaque worker, transmis une seule fois à son démarrage
+_engine_worker = None
+
+
+def _initialiser_worker(engine):
+    global _engine_worker
+    _engine_worker = engine
+
+
+def tirer_parametres(graine, nb_tirages, labels, concentration=1.0, alpha_min=0.0, alpha_max=1.0):
+    """
+    Tire des scénarios aléatoires : poids selon une loi de Dirichlet, alpha uniforme.
+
+    Args:
+        graine: Graine ou np.random.SeedSequence du générateur.
+        nb_tirages (int): Nombre de scénarios tirés.
+        labels (list): Libellés des variables socio pondérées.
+        concentration (float | array-like): Paramètre(s) de la loi de Dirichlet
+            (1 = poids uniformes sur le simplexe ; un vecteur centre les tirages sur des poids de référence).
+        alpha_min, alpha_max (float): Bornes de la loi uniforme d'alpha.
+
+    Returns:
+        tuple: (poids: pd.DataFrame (nb_tirages, len(labels)), alphas: np.ndarray (nb_tirages,))
+    """
+    rng = np.random.default_rng(graine)
+    concentration = np.broadcast_to(np.asarray(concentration, dtype=np.float64), (len(labels),))
+    poids = pd.DataFrame(rng.dirichlet(concentration, size=nb_tirages), columns=list(labels))
+    alphas = rng.uniform(alpha_min, alpha_max, size=nb_tirages)
+    return poids, alphas
+
+
+def bornes_classes(n, nb_classes):
+    """
+    Bornes des classes de rangs [b_i, b_i+1) : rangs exacts si n <= nb_classes,
+    sinon classes de largeur géométrique (fines en tête de classement, larges en queue).
+    """
+    if n <= nb_classes:
+        return np.arange(1, n + 2)
+    return np.unique(np.round(np.geomspace(1, n + 1, nb_classes + 1))).astype(np.int64)
+
+
+def _analyser_lot(graine, nb_tirages, labels, concentration, alpha_min, alpha_max, profession, k, bornes,
+                  engine=None):
+    """
+    Recalcule les scores d'un lot de tirages et accumule, pour chaque unité :
+    histogramme des rangs (une colonne par classe de `bornes`), nombre de fois dans le top k,
+    somme des rangs et nombre de tirages où l'unité est classée.
+    """
+    engine = engine if engine is not None else _engine_worker
+    poids, alphas = tirer_parametres(graine, nb_tirages, labels, concentration, alpha_min, alpha_max)
+    scores = _calculer_scenarios(engine, poids, alphas, profession, dtype=np.float64)[:, :, 2]
+    r = rangs(scores)
+
+    n = engine.n
+    nb_classes = len(bornes) - 1
+    classees = np.isfinite(r)
+    unite = np.broadcast_to(np.arange(n), r.shape)[classees]
+    classe = np.searchsorted(bornes, r[classees], side="right") - 1
+
+    histogramme = np.bincount(unite * nb_classes + classe, minlength=n * nb_classes).reshape(n, nb_classes)
+    dans_top = np.sum(r <= k, axis=0)
+    somme_rangs = np.nansum(r, axis=0)
+    nb_classements = np.sum(classees, axis=0)
+    return histogramme, dans_top, somme_rangs, nb_classements
+
+
+def _quantile_histogramme(histogramme, bornes, q):
+    """Rang (dernier rang de la classe) sous lequel se trouve la proportion q des tirages de chaque unité."""
+    cumul = np.cumsum(histogramme, axis=1)
+    total = cumul[:, -1:]
+    classe = np.argmax(cumul >= q * total, axis=1)
+    return np.where(total[:, 0] > 0, bornes[classe + 1] - 1, np.nan)
+
+
+def analyse_sensibilite(engine, labels, profession, codes, nb_tirages=2000, concentration=1.0,
+                        alpha_min=0.0, alpha_max=1.0, k=TAILLE_CLASSEMENT, nb_classes=100,
+                        taille_lot=100, nb_workers=None, graine=0):
+    """
+    Analyse Monte Carlo de la stabilité des classements : tire nb_tirages vecteurs de poids
+    (Dirichlet) et d'alpha, recalcule les scores de double vulnérabilité par lots vectorisés
+    répartis sur plusieurs processus, et résume la distribution des rangs de chaque unité.
+
+    Chaque lot a sa propre graine (SeedSequence.spawn) : le résultat ne dépend pas du nombre de workers.
+
+    Args:
+        engine (ScoringEngine): Moteur construit sur les unités à classer (communes ou départements).
+        labels (list): Libellés des variables socio dont les poids sont tirés.
+        profession (str): Profession de santé (libellé ou colonne APL) du score d'accès.
+        codes (array-like): Code INSEE des unités, dans l'ordre du moteur.
+        nb_tirages (int): Nombre de scénarios tirés.
+        concentration (float | array-like): Paramètre(s) de la loi de Dirichlet des poids.
+        alpha_min, alpha_max (float): Plage des valeurs d'alpha.
+        k (int): Taille du top étudié.
+        nb_classes (int): Nombre maximal de classes de l'histogramme des rangs (voir bornes_classes).
+        taille_lot (int): Nombre de tirages recalculés ensemble.
+        nb_workers (int): Nombre de processus (None = nombre de cœurs, 1 = sans pool).
+        graine (int): Graine du tirage.
+
+    Returns:
+        dict: {
+            "resume": pd.DataFrame (une ligne par unité : code_insee, rang_moyen, rang_p5,
+                      rang_median, rang_p95, proba_top_k), trié par proba_top_k décroissante,
+            "histogramme": np.ndarray (n, nb_classes) des effectifs par classe de rangs,
+            "bornes": np.ndarray (nb_classes + 1) des bornes des classes [b_i, b_i+1),
+        }
+    """
+    bornes = bornes_classes(engine.n, nb_classes)
+    tailles = [min(taille_lot, nb_tirages - debut) for debut in range(0, nb_tirages, taille_lot)]
+    graines = np.random.SeedSequence(graine).spawn(len(tailles))
+    parametres = (list(labels), concentration, alpha_min, alpha_max, profession, k, bornes)
+
+    nb_workers = nb_workers or os.cpu_count() or 1
+    print(f"🔄 Analyse de sensibilité : {nb_tirages} tirages en {len(tailles)} lots sur {nb_workers} processus")
+
+    if nb_workers == 1 or len(tailles) == 1:
+        resultats = [_analyser_lot(g, t, *parametres, engine=engine) for g, t in zip(graines, tailles)]
+    else:
+        with ProcessPoolExecutor(max_workers=nb_workers, initializer=_initialiser_worker, initargs=(engine,)) as pool:
+            futures = [pool.submit(_analyser_lot, g, t, *parametres) for g, t in zip(graines, tailles)]
+            resultats = [f.result() for f in futures]
+
+    histogramme = sum(r[0] for r in resultats)
+    dans_top = sum(r[1] for r in resultats)
+    somme_rangs = sum(r[2] for r in resultats)
+    nb_classements = sum(r[3] for r in resultats)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        resume = pd.DataFrame({
+            "code_insee": np.asarray(codes, dtype=str),
+            "rang_moyen": np.round(somme_rangs / nb_classements, 1),
+            "rang_p5": _quantile_histogramme(histogramme, bornes, 0.05),
+            "rang_median": _quantile_histogramme(histogramme, bornes, 0.5),
+            "rang_p95": _quantile_histogramme(histogramme, bornes, 0.95),
+            "proba_top_k": np.round(dans_top / nb_tirages, 3),
+        })
+    resume = resume.sort_values(["proba_top_k", "rang_moyen"], ascending=[False, True]).reset_index(drop=True)
+
+    print(f"✅ Analyse de sensibilité terminée ({engine.n} unités, top {k})")
+    return {"resume": resume, "histogramme": histogramme, "bornes": bornes}
@@ -1,266 +1,137 @@
 import numpy as np
 from src.variables import COLOR_RANGE
+from src.scoring import ScoringEngine
+from src.registry import get_registry, scope_from_mode
 import pandas as pd
-import json
-import os
-import streamlit as st
 
 # ===========================
 # Chargement des données des variables
 # ===========================
 
-@st.cache_data
 def load_variables():
     """Retourne la liste des différentes variables issue des fichiers
     variable_communes.json et variable_departements.json
     sous forme de dictionnaire {nom_humain: nom_colonne}"""
-    
-    variables = {}
-    
-    # Charger variable_communes.json
-    fichier_communes = "data/variable_communes.json"
-    if os.path.exists(fichier_communes):
-        with open(fichier_communes, 'r', encoding='utf-8') as f:
-            data_communes = json.load(f)
-            for nom_humain, infos in data_communes.items():
-                if nom_humain not in variables:
-                    variables[nom_humain] = infos.get("nom_col")
-    
-    # Charger variable_departements.json
-    fichier_departements = "data/variable_departements.json"
-    if os.path.exists(fichier_departements):
-        with open(fichier_departements, 'r', encoding='utf-8') as f:
-            data_departements = json.load(f)
-            for nom_humain, infos in data_departements.items():
-                if nom_humain not in variables:
-                    variables[nom_humain] = infos.get("nom_col")
-    
-    print("\n ✅ Variables chargées depuis les fichiers :", fichier_communes, "et", fichier_departements)
-    return variables
-
-@st.cache_data
+    return get_registry().variables()
+
 def load_socio_variables():
     """Retourne uniquement les variables socio-économiques issue des fichiers
     variable_communes.json et variable_departements.json
     sous forme de dictionnaire {nom_humain: nom_colonne}"""
-    
-    variables_socio = {}
-    
-    # Charger variable_communes.json
-    fichier_communes = "data/variable_communes.json"
-    if os.path.exists(fichier_communes):
-        with open(fichier_communes, 'r', encoding='utf-8') as f:
-            data_communes = json.load(f)
-            for nom_humain, infos in data_communes.items():
-                if infos.get("type") == "socio" and nom_humain not in variables_socio:
-                    variables_socio[nom_humain] = infos.get("nom_col")
-    
-    # Charger variable_departements.json
-    fichier_departements = "data/variable_departements.json"
-    if os.path.exists(fichier_departements):
-        with open(fichier_departements, 'r', encoding='utf-8') as f:
-            data_departements = json.load(f)
-            for nom_humain, infos in data_departements.items():
-                if infos.get("type") == "socio" and nom_humain not in variables_socio:
-                    variables_socio[nom_humain] = infos.get("nom_col")
-    
-    return variables_socio
-
-@st.cache_data
+    return get_registry().variables("socio")
+
 def load_sante_variables():
     """Retourne uniquement les variables de santé issue des fichiers
     variable_communes.json et variable_departements.json
     sous forme de dictionnaire {nom_humain: nom_colonne}"""
-    
-    variables_sante = {}
-    
-    # Charger variable_communes.json
-    fichier_communes = "data/variable_communes.json"
-    if os.path.exists(fichier_communes):
-        with open(fichier_communes, 'r', encoding='utf-8') as f:
-            data_communes = json.load(f)
-            for nom_humain, infos in data_communes.items():
-                if infos.get("type") == "sante" and nom_humain not in variables_sante:
-                    variables_sante[nom_humain] = infos.get("nom_col")
-    
-    # Charger variable_departements.json
-    fichier_departements = "data/variable_departements.json"
-    if os.path.exists(fichier_departements):
-        with open(fichier_departements, 'r', encoding='utf-8') as f:
-            data_departements = json.load(f)
-            for nom_humain, infos in data_departements.items():
-                if infos.get("type") == "sante" and nom_humain not in variables_sante:
-                    variables_sante[nom_humain] = infos.get("nom_col")
-    
-    return variables_sante
-
-@st.cache_data
+    return get_registry().variables("sante")
+
 def load_dico_communes():
-    """ Retourne le dictionnaire des variables pour les communes sous le même forme que le json"""
-    
-    fichier_communes = "data/variable_communes.json"
-    if os.path.exists(fichier_communes):
-        with open(fichier_communes, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    return {}
-
-@st.cache_data
+    """ Retourne le dictionnaire des variables pour les communes sous le même forme que le json (lecture seule)"""
+    return get_registry().dico("communes")
+
 def load_dico_departements():
-    """ Retourne le dictionnaire des variables pour les départements sous le même forme que le json"""
-    
-    fichier_departements = "data/variable_departements.json"
-    if os.path.exists(fichier_departements):
-        with open(fichier_departements, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    
-    return {}
+    """ Retourne le dictionnaire des variables pour les départements sous le même forme que le json (lecture seule)"""
+    return get_registry().dico("departements")
 
 
 # ===========================
 # Calcul des scores
 # ===========================
-def compute_socio_score(df, selected_vars, weights, scope_mode):
+def get_scoring_engine(df, scope_mode):
+    """
+    Construit le moteur de scores vectorisé pour les unités de df,
+    avec les métadonnées (min/max/order) du périmètre choisi.
+    """
+    return ScoringEngine(df, get_registry(), scope_from_mode(scope_mode))
+
+def new_score_frame(df):
+    """Retourne un DataFrame de scores vide (sans géométrie) aligné sur l'index de df."""
+    return pd.DataFrame(index=df.index)
+
+def compute_socio_score(df, selected_vars, weights, scope_mode, engine=None, scores=None):
     """
     Calcule le score de vulnérabilité socio-économique V en [0,100].
 
-    df : GeoDataFrame
+    df : DataFrame / GeoDataFrame des unités (non modifié, non copié)
     selected_vars : liste de labels "humains" (clés de load_socio_variables())
     weights : dict {label_humain: poids_float}
     scope_mode : "France" ou "Departement" (ou ce que tu utilises)
+    engine : ScoringEngine déjà construit sur df (optionnel)
+    scores : DataFrame de scores aligné sur df auquel ajouter la colonne (optionnel)
+
+    Retourne le DataFrame de scores (sans géométrie) avec la colonne "score_socio".
     """
     print("🔄 Calcul du score socio-économique avec les variables :", selected_vars)
-    if not selected_vars:
-        df["score_socio"] = np.nan
-        return df
-
-    tmp = df.copy()
-
-    # score sera une série; on initialise à 0
-    score = pd.Series(0.0, index=tmp.index)
-
-    # somme des poids pour normaliser
-    total_weight = sum(weights[v] for v in selected_vars if v in weights)
-    if total_weight <= 0:
-        tmp["score_socio"] = np.nan
-        return tmp
-
-    # dico des variables socio : {nom_humain: nom_colonne}
-    socio_vars = load_socio_variables()
-
-    # données de référence pour min/max/order
-    if scope_mode == "France":
-        all_vars = load_dico_departements()
-    else:
-        all_vars = load_dico_communes()
-
-    for var_label in selected_vars:
-        # sécurité poids + variable connue
-        if var_label not in weights or var_label not in socio_vars:
-            continue
+    if engine is None:
+        engine = get_scoring_engine(df, scope_mode)
+    if scores is None:
+        scores = new_score_frame(df)
 
-        col_name = socio_vars[var_label]
-        if col_name not in tmp.columns:
-            continue
+    scores["score_socio"] = engine.score_socio(selected_vars, weights)
+    return scores
 
-        col_data = tmp[col_name].astype(float)
-
-        # --- récupérer data_info pour cette variable ---
-        data_info = find_variable_info(all_vars, col_name, "socio")
-
-        # min / max : d’abord dans data_info, sinon on calcule dans le df
-        if data_info is not None and "min" in data_info and "max" in data_info:
-            col_min = data_info["min"]
-            col_max = data_info["max"]
-        else:
-            col_min = col_data.min()
-            col_max = col_data.max()
-
-        # pas de variation → n'apporte rien
-        if pd.isna(col_min) or pd.isna(col_max) or col_max == col_min:
-            norm = pd.Series(0.0, index=tmp.index)
-        else:
-            norm = (col_data - col_min) / (col_max - col_min)
-
-        # --- ordre : True = haut = plus vulnérable ; False = bas = plus vulnérable ---
-        order_normal = True
-        if data_info is not None and "order" in data_info:
-            order_normal = data_info["order"]
-
-        if not order_normal:
-            norm = 1 - norm
-
-        # poids normalisé
-        w = weights[var_label] / total_weight
-
-        score = score + w * norm
-
-    # score final sur 0–100
-    tmp["score_socio"] = (score * 100).round(2)
-    return tmp
-
-def compute_access_score(df, access_col, scope_mode):
+def compute_access_score(df, access_col, scope_mode, engine=None, scores=None):
     """
     Calcule le score de difficulté d'accès aux soins
     à partir d'une colonne APL (plus APL est haut, meilleur est l'accès).
     On renverse pour obtenir une "difficulté".
+
+    Retourne le DataFrame de scores (sans géométrie) avec la colonne "score_acces".
     """
     print(f"🔄 Calcul du score d'accès aux soins à partir de la colonne {access_col}")
-    tmp = df.copy()
-
-    if access_col not in tmp.columns:
-        tmp["score_acces"] = np.nan
-        return tmp
-
-    apl = tmp[access_col].astype(float)
-
-    if scope_mode == "France":
-        all_vars = load_dico_departements()
-    else:
-        all_vars = load_dico_communes()
+    if engine is None:
+        engine = get_scoring_engine(df, scope_mode)
+    if scores is None:
+        scores = new_score_frame(df)
 
-    data_info = find_variable_info(all_vars, access_col, "sante")
-    if data_info is not None and "min" in data_info and "max" in data_info:
-        apl_min = data_info["min"]
-        apl_max = data_info["max"]
-    else:
-        apl_min = apl.min()
-        apl_max = apl.max()
-
-    if pd.isna(apl_min) or pd.isna(apl_max) or apl_max == apl_min:
-        norm_apl = pd.Series(0.0, index=tmp.index)
-    else:
-        norm_apl = (apl - apl_min) / (apl_max - apl_min)
-    difficulte = 1 - norm_apl
-
-    tmp["score_acces"] = (difficulte * 100).round(2)  # 100 = difficulté max
-    return tmp
+    scores["score_acces"] = engine.score_acces(access_col)  # 100 = difficulté max
+    return scores
 
-def compute_double_vulnerability(df, alpha=0.5):
+def compute_double_vulnerability(scores, alpha=0.5):
     """
     Combine les scores socio (V) et accès (D_access) en un score DV.
     DV = alpha * V + (1 - alpha) * score_acces
+
+    scores : DataFrame de scores contenant "score_socio" et "score_acces" (complété sur place)
     """
     print(f"🔄 Calcul du score de double vulnérabilité avec alpha={alpha}")
-    tmp = df.copy()
-    if "score_socio" not in tmp.columns or "score_acces" not in tmp.columns:
-        tmp["score_double"] = np.nan
-        return tmp
+    if "score_socio" not in scores.columns or "score_acces" not in scores.columns:
+        scores["score_double"] = np.nan
+        return scores
 
-    tmp["score_double"] = (alpha * tmp["score_socio"] + (1 - alpha) * tmp["score_acces"]).round(2)
-    return tmp
+    scores["score_double"] = ScoringEngine.score_double(scores["score_socio"], scores["score_acces"], alpha)
+    return scores
 
 # ===========================
 # Couleurs pour les cartes
 # ===========================
-def get_color_scale(value, col_name, type_data, scope_mode, color_range=COLOR_RANGE, df_scores=None):
+
+# Palette sous forme de table de correspondance uint8 (indexée directement par NumPy)
+COLOR_TABLE = np.asarray(COLOR_RANGE, dtype=np.uint8)
+
+def get_map_stats(col_name, type_data, scope_mode, df_scores=None):
+    """
+    Retourne les stats servant à colorer une carte et à construire sa légende :
+    quantiles des scores calculés sur df_scores pour les colonnes "score*",
+    métadonnées de la variable sinon.
     """
-    Retourne une couleur RGBA pour une valeur.
+    if col_name.startswith("score"):
+        return get_score_stats(df_scores, col_name)
+    return get_variable_stats(col_name, type_data, scope_mode)
+
+def get_colors(values, stats, color_table=COLOR_TABLE, alpha=180, nan_color=(128, 128, 128, 100)):
+    """
+    Retourne les couleurs RGBA (tableau uint8 de forme (n, 4)) pour un vecteur de valeurs.
+
+    - les stats (p5/p95/order_normal) sont calculées une seule fois par l'appelant ;
+    - clipping à [p5, p95], normalisation en [0,1], inversion si order_normal = False ;
+    - indexation directe de la palette color_table ;
+    - NaN -> nan_color, plage nulle -> gris.
     """
-    if not col_name.startswith("score"):
-        stats = get_variable_stats(col_name, type_data, scope_mode)
-    else :
-        stats = get_score_stats(df_scores, col_name)
+    values = np.asarray(values, dtype=float)
+    colors = np.empty((len(values), 4), dtype=np.uint8)
+    colors[:] = nan_color
 
     if stats is not None:
         min_val = stats["p5"]
@@ -272,18 +143,19 @@ def get_color_scale(value, col_name, type_data, scope_mode, color_range=COLOR_RA
         max_val = 100.0
         order_normal = True
 
-    
-    if pd.isna(value) or max_val == min_val:
-        return [128, 128, 128, 100]   # gris
-    
-    normalized = clip_and_normalize_value(
-        value=value,
-        min_val=min_val,
-        max_val=max_val,
-        order_normal=order_normal
-    )
+    valid = ~np.isnan(values)
+    if max_val == min_val:
+        colors[valid] = (128, 128, 128, 100)   # gris
+        return colors
+
+    normalized = (np.clip(values[valid], min_val, max_val) - min_val) / (max_val - min_val)
+    if not order_normal:
+        normalized = 1 - normalized
 
-    return normalized_to_color(normalized, color_range=color_range, alpha=180)
+    index = (normalized * (len(color_table) - 1)).astype(np.intp)
+    colors[valid, :3] = color_table[index]
+    colors[valid, 3] = alpha
+    return colors
 
 def get_score_stats(df_scores: pd.DataFrame, col_name: str) -> dict | None:
     """
@@ -319,16 +191,10 @@ def get_variable_stats(col_name: str, type_data: str, scope_mode: str):
     Récupère les informations pour une variable 'simple' (non score) :
     - stats : {min, max, p5, q1, q2, q3, p95, order}
     """
-    # Charger le dictionnaire adéquat
-    if scope_mode == "France":
-        all_vars = load_dico_departements()
-    else:
-        all_vars = load_dico_communes()
-
-    data_info = find_variable_info(all_vars, col_name, type_data)
+    data_info = get_registry().info(scope_from_mode(scope_mode), col_name, type_data)
 
     if data_info is None:
-        return None, None, True, None
+        return None
 
     stats = {
         "min": round(float(data_info["min"]),1),
@@ -343,49 +209,3 @@ def get_variable_stats(col_name: str, type_data: str, scope_mode: str):
     }
 
     return stats
-
-def clip_and_normalize_value(value, min_val: float, max_val: float, order_normal: bool):
-    """
-    Gère :
-    - NaN ou plage nulle -> None
-    - clipping à [min_val, max_val]
-    - normalisation en [0,1]
-    - inversion si order_normal = False
-    """
-    if pd.isna(value) or min_val == max_val:
-        return None
-
-    # clipping
-    if value < min_val:
-        value_clipped = min_val
-    elif value > max_val:
-        value_clipped = max_val
-    else:
-        value_clipped = value
-
-    normalized = (value_clipped - min_val) / (max_val - min_val)
-
-    if not order_normal:
-        normalized = 1 - normalized
-
-    return normalized
-
-def normalized_to_color(normalized: float, color_range=COLOR_RANGE, alpha: int = 180):
-    """
-    Convertit un score normalisé [0,1] en couleur RGBA
-    à partir de la palette color_range.
-    """
-    if normalized is None:
-        # gris pour valeur manquante / plage nulle
-        return [128, 128, 128, 100]
-
-    index = int(normalized * (len(color_range) - 1))
-    r, g, b = color_range[index]
-    return [r, g, b, alpha]
-
-@st.cache_data
-def find_variable_info(all_vars, col_name, type_data):
-    for key, info in all_vars.items():
-        if info["nom_col"] == col_name and info["type"] == type_data:
-            return info
-    return None
\ No newline at end of file
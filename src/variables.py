@@ -5,6 +5,52 @@
 CHEMIN_COMMUNES = "data/communes.json"
 CHEMIN_DEPARTEMENTS = "data/departements.json"
 CHEMIN_GEOJSON = "data/departements_polygon.geojson"
+CHEMIN_GEOMETRIE_DEPARTEMENTS = "data/departements_geometrie.parquet"
+DOSSIER_COMMUNES_DEPARTEMENTS = "data/communes_departements"
+CHEMIN_VARIABLES_COMMUNES = "data/variable_communes.json"
+CHEMIN_VARIABLES_DEPARTEMENTS = "data/variable_departements.json"
+
+# Nombre de départements gardés en mémoire par le chargeur de partitions
+TAILLE_CACHE_DEPARTEMENTS = 16
+
+# Polygones des communes, un GeoParquet par département (produits par geometrie_communes.py)
+DOSSIER_GEOMETRIE_COMMUNES = "data/communes_geometrie"
+
+# Nombre de cartes PyDeck gardées en cache (toutes sessions confondues)
+TAILLE_CACHE_CARTES = 64
+
+# Géométries empaquetées gardées en cache et décimales conservées pour les coordonnées
+TAILLE_CACHE_GEOMETRIES = 32
+PRECISION_COORDONNEES = 4
+
+# Rayon des hexagones de la vue nationale des communes, en degrés de latitude (~9 km)
+TAILLE_HEXAGONE = 0.08
+
+# Tuiles vectorielles (produites par tuiles_vectorielles.py, servies par Streamlit depuis static/)
+DOSSIER_TUILES = "static/tiles"
+URL_TUILES = "app/static/tiles/{couche}/{{z}}/{{x}}/{{y}}.pbf"
+
+# Pyramide de niveaux de détail des polygones (produite par geometrie_departements.py et geometrie_communes.py) :
+# colonne géométrique -> tolérance de simplification en degrés, du plus grossier au plus fin.
+# Seules les tuiles vectorielles (tuiles_vectorielles.py) changent de niveau avec le zoom.
+NIVEAUX_DETAIL = {
+    "geometry": 0.02,
+    "geometry_regional": 0.005,
+    "geometry_departemental": 0.001,
+}
+
+# Niveau affiché par les cartes hors tuiles (PyDeck et rendu navigateur), qui s'ouvrent à un zoom fixe
+# par échelle : national pour les départements, régional pour les communes d'un département
+GEOMETRIE_AFFICHEE = {
+    "France": "geometry",
+    "Département": "geometry_regional",
+}
+
+# Mémoire (octets) allouée aux tableaux temporaires des calculs par lots (scénarios, rééchantillonnages)
+BUDGET_MEMOIRE = 256 * 1024 ** 2
+
+# Nombre d'unités affichées dans le tableau de classement
+TAILLE_CLASSEMENT = 10
 
 COLUMN_MAPPING = {
     "nom_commune": "Commune",
@@ -19,6 +65,11 @@ COLUMN_MAPPING = {
     "apl_sagesfemmes": "Accès aux sages-femmes (en ETP/100 000 hab)",
     "apl_kine": "Accès aux kinésithérapeutes (en ETP/100 000 hab)",
     "population_totale": "Population",
+    "rang_departemental": "Rang dans le département",
+    "rang_national": "Rang national",
+    "percentile_national": "Percentile national (en %)",
+    "rang_ic_bas": "Rang min. (IC 90 %)",
+    "rang_ic_haut": "Rang max. (IC 90 %)",
 }
 
 COLOR_RANGE = [
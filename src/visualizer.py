@@ -1,38 +1,79 @@
+import base64
+import json
+import os
 import streamlit as st
+import streamlit.components.v1 as components
 import pydeck as pdk
 import pandas as pd
-import json
-import geopandas as gpd
+import numpy as np
+from pydeck.bindings.json_tools import default_serialize
 from src.utils import *
-from src.variables import COLOR_RANGE
+from src.cache import LRUCache, array_fingerprint, make_key
+from src.geometrie import pack_polygons, to_json_list, to_records
+from src.agregation import GrilleHexagonale
+from src.variables import COLOR_RANGE, DOSSIER_TUILES, GEOMETRIE_AFFICHEE, NIVEAUX_DETAIL, PRECISION_COORDONNEES, TAILLE_CACHE_CARTES, TAILLE_HEXAGONE, URL_TUILES
+
+# Composant de carte recolorée côté navigateur (src/components/carte/index.html)
+_composant_carte = components.declare_component(
+    "carte", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "carte")
+)
+
+# Colonnes affichées dans le tooltip selon le périmètre
+TOOLTIP_COLUMNS = {
+    "France": ["nom_departement", "code_insee"],
+    "Département": ["nom_commune"],
+    "France (communes)": [],
+}
 
-def plot_map(title, col_name, data, scope_mode, type_data, df_scores=None, change_var=None):
+# Couche de tuiles vectorielles utilisée selon le périmètre (produite par tuiles_vectorielles.py)
+COUCHES_TUILES = {
+    "France": "departements",
+    "Département": "communes",
+}
+
+class CompactDeck(pdk.Deck):
+    """
+    Deck PyDeck sérialisé sans indentation : la spécification envoyée au navigateur
+    (coordonnées, couleurs, tooltips) est environ deux fois plus légère.
+    """
+
+    def to_json(self):
+        return json.dumps(self, sort_keys=True, default=default_serialize, separators=(",", ":"))
+
+def plot_map(title, col_name, data, scope_mode, type_data, df_scores=None, rendu="pydeck"):
     """
     Affiche une carte PyDeck pour visualiser une variable selon le périmètre (France/Département).
     
     Args:
         title (str): Le titre de la carte (ex: "Taux de pauvreté").
         col_name (str): Le nom de la colonne de la variable (ex: "tx_pauvrete").
-        data (pd.DataFrame): Le DataFrame filtré (départements ou communes).
-        scope_mode (str): "France" (départements) ou "Département" (communes).
+        data (pd.DataFrame): Le DataFrame filtré (départements ou communes), partagé en lecture seule.
+        scope_mode (str): "France" (départements), "Département" (communes)
+            ou "France (communes)" (communes agrégées en hexagones).
         type_data (str): Le type de donnée ("socio" ou "sante").
-        df_scores (pd.DataFrame, optional): DataFrame des scores pour les variables de score
+        df_scores (pd.DataFrame, optional): Scores (sans géométrie) alignés sur l'index de data
+        rendu (str): "pydeck" (carte complète à chaque rerun), "navigateur" (géométrie envoyée
+            une seule fois, recolorée dans le navigateur) ou "tuiles" (tuiles vectorielles locales)
     """
-    deck = build_map_deck(title, col_name, data, scope_mode, type_data, df_scores, change_var)
-    if deck:
-        if df_scores is None:
-            st.pydeck_chart(deck, height=300, width='stretch')
-        else:
-            st.pydeck_chart(deck, width='stretch')
-
-        # RÉCUP DES STATS POUR LA LÉGENDE
-        if col_name.startswith("score"):
-            # scores → on prend les quantiles calculés sur df_scores
-            stats = get_score_stats(df_scores, col_name) if df_scores is not None else None
-        else :
-            # autres variables → on prend les stats sur data
-            stats = get_variable_stats(col_name, type_data, scope_mode)
-           
+    st.markdown(f"##### {title}")
+
+    tuiles = get_tile_index(COUCHES_TUILES[scope_mode]) if rendu == "tuiles" and scope_mode in COUCHES_TUILES else None
+
+    # Les hexagones de la vue nationale des communes sont déjà légers : toujours rendus par PyDeck
+    if rendu == "navigateur" and scope_mode != "France (communes)":
+        affichee, stats = plot_client_map(title, col_name, data, scope_mode, type_data, df_scores)
+    else:
+        deck, stats = get_map_deck(title, col_name, data, scope_mode, type_data, df_scores, tuiles)
+        affichee = bool(deck)
+        if deck:
+            if df_scores is None:
+                st.pydeck_chart(deck, height=300, width='stretch')
+            else:
+                st.pydeck_chart(deck, width='stretch')
+
+    if affichee:
+        # LÉGENDE : mêmes stats que pour la coloration
+        # (scores → quantiles calculés sur df_scores ; autres variables → métadonnées)
         if stats is not None:
             # AFFICHAGE DE LA LÉGENDE
             legend_colors = COLOR_RANGE[::-1]     # haut=rouge, bas=vert
@@ -112,114 +153,429 @@ def plot_map(title, col_name, data, scope_mode, type_data, df_scores=None, chang
             
             st.html(legend_html)
 
-@st.cache_data
-def build_map_deck(title, col_name, _data, scope_mode, type_data, _df_scores=None, change_var=None):
-    print(f"🔄 Construction de la carte pour {title} en mode {scope_mode}")
-    data = _data.copy()
-    df_scores = _df_scores.copy() if _df_scores is not None else None
+def get_map_values(col_name, data, df_scores=None):
+    """
+    Retourne les valeurs numériques à cartographier, alignées sur l'index de data :
+    la colonne de df_scores si elle y est (scores), sinon celle de data (variables brutes).
+    """
+    if df_scores is not None and col_name in df_scores.columns:
+        return pd.to_numeric(df_scores[col_name], errors='coerce')
+    if data is not None and col_name in data.columns:
+        return pd.to_numeric(data[col_name], errors='coerce')
+    return None
 
-    st.markdown(f"##### {title}")
-    
-    if data is None or data.empty or col_name not in data.columns:
+@st.cache_resource
+def get_deck_cache():
+    """Cache des cartes PyDeck, partagé par toutes les sessions du processus."""
+    return LRUCache(maxsize=TAILLE_CACHE_CARTES)
+
+def view_fingerprint(data):
+    """Empreinte des unités affichées (codes INSEE et centre de la vue)."""
+    codes = data["code_insee"] if "code_insee" in data.columns else data.index.to_series()
+    return make_key(array_fingerprint(codes.astype(str)), data.attrs.get("centroide"))
+
+def get_map_deck(title, col_name, data, scope_mode, type_data, df_scores=None, tuiles=None):
+    """
+    Retourne (deck, stats) pour une carte, en réutilisant une carte déjà construite
+    si toutes ses entrées sont identiques : valeurs de la colonne, unités affichées,
+    périmètre et stats de coloration. La clé étant calculée sur le contenu,
+    une carte périmée ne peut pas être resservie.
+    Si `tuiles` est fourni (voir get_tile_index), la carte utilise les tuiles vectorielles.
+    """
+    values = get_map_values(col_name, data, df_scores)
+    if data is None or data.empty or values is None:
         st.info(f"Aucune donnée disponible pour {title} ou la colonne '{col_name}' est manquante.")
-        return False
+        return None, None
 
-    # Nettoyage et préparation de la variable cible
-    data_plot = data.copy()
-    data_plot[col_name] = pd.to_numeric(data_plot[col_name], errors='coerce')
-    
+    # Stats de coloration calculées une seule fois pour toute la colonne
+    stats = get_map_stats(col_name, type_data, scope_mode, df_scores)
+    compact = df_scores is None
 
-    # Détermination de l'état initial de la vue
-    # Centre de la France par défaut (ou centre des données si disponible)
-    initial_view_state = pdk.ViewState(
-        latitude=46.6,
-        longitude=-1 if df_scores is None else 2.2,
-        zoom=3.5 if df_scores is None else 4,
-        pitch=0,
+    cache = get_deck_cache()
+    key = make_key(
+        col_name, scope_mode, type_data, compact, stats, tuiles is not None,
+        array_fingerprint(values), view_fingerprint(data),
     )
-    
+    deck = cache.get(key)
+    if deck is not None:
+        print(f"♻️  Carte réutilisée pour {title} ({cache.stats()})")
+        return deck, stats
+
+    if tuiles is not None:
+        deck = build_tile_deck(title, col_name, data, values, stats, scope_mode, compact, tuiles)
+    else:
+        deck = build_map_deck(title, col_name, data, values, stats, scope_mode, compact)
+    if deck:
+        cache.put(key, deck)
+    return deck, stats
+
+def get_tile_index(couche, dossier=DOSSIER_TUILES):
+    """
+    Métadonnées d'une couche de tuiles vectorielles et index des codes INSEE
+    dans l'ordre des identifiants 'idx' portés par les entités des tuiles.
+    L'absence des tuiles n'est pas mise en cache : des tuiles générées pendant
+    que l'application tourne sont utilisées dès l'affichage suivant.
+
+    Returns:
+        dict | None: {metadata, codes (pd.Index)}, ou None si les tuiles n'ont pas été générées.
+    """
+    chemin = os.path.join(dossier, couche, "metadata.json")
+    if not os.path.exists(chemin):
+        print(f"⚠️ Tuiles absentes pour la couche '{couche}' (lancer tuiles_vectorielles.py), rendu PyDeck classique.")
+        return None
+    # La date de modification fait partie de la clé du cache : des tuiles régénérées sont relues
+    return load_tile_index(chemin, os.path.getmtime(chemin))
+
+@st.cache_resource
+def load_tile_index(chemin, date_modification):
+    """Lit le metadata.json d'une couche de tuiles (voir get_tile_index)."""
+    with open(chemin, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    return {"metadata": metadata, "codes": pd.Index(metadata.pop("codes"))}
+
+def tile_color_expression(data, colors, tuiles):
+    """
+    Expression deck.gl qui donne la couleur d'une entité de tuile à partir de sa propriété 'idx' :
+    une petite palette (couleurs distinctes) indexée par une classe par entité.
+    Seule la plage d'identifiants des unités affichées est envoyée (les codes des tuiles sont triés :
+    en mode Département, celle des communes du département, et non les ~35 000 communes).
+    Les entités hors de la vue (autres départements) sont transparentes.
+    """
+    palette, classes_unites = np.unique(colors, axis=0, return_inverse=True)
+    classes_unites = classes_unites.reshape(-1)
+    idx = tuiles["codes"].get_indexer(pd.Index(data["code_insee"].astype(str)))
+    presentes = idx >= 0
+    debut = int(idx[presentes].min()) if presentes.any() else 0
+    fin = int(idx[presentes].max()) + 1 if presentes.any() else 0
+    classes = np.full(fin - debut, len(palette))
+    classes[idx[presentes] - debut] = classes_unites[presentes]
+    palette = np.vstack([palette, [[0, 0, 0, 0]]])
+
+    compact_json = lambda v: json.dumps(v, separators=(",", ":"))
+    indice = f"properties.idx - {debut}" if debut else "properties.idx"
+    # PyDeck préfixe lui-même la chaîne par "@@=" (expression évaluée par @deck.gl/json) ;
+    # hors de la plage envoyée, l'entité prend la couleur transparente
+    return (f"{compact_json(palette.tolist())}[{compact_json(classes.tolist())}[{indice}]]"
+            f" || {compact_json(palette[-1].tolist())}")
+
+def build_tile_deck(title, col_name, data, values, stats, scope_mode, compact, tuiles):
+    """
+    Construit une carte à partir des tuiles vectorielles locales (servies par Streamlit
+    depuis static/tiles). Aucune géométrie n'est sérialisée : seules une palette et une
+    classe de couleur par entité sont envoyées, jointes dans le navigateur par 'idx'.
+    """
+    print(f"🔄 Construction de la carte tuilée pour {title} en mode {scope_mode}")
+    metadata = tuiles["metadata"]
+
+    colors = get_colors(values.to_numpy(dtype=float), stats, nan_color=(220, 220, 220, 60))
+    vue = get_view_state(data, scope_mode, compact)
+
+    # En mode Département, les tuiles ne sont demandées que sur l'emprise du département
+    emprise = data.attrs.get("bbox") if scope_mode == "Département" else None
+
+    layer = pdk.Layer(
+        "MVTLayer",
+        data=URL_TUILES.format(couche=metadata["couche"]),
+        min_zoom=metadata["minzoom"],
+        max_zoom=metadata["maxzoom"],
+        extent=emprise or metadata["bounds"],
+        binary=False,
+        pickable=True,
+        stroked=True,
+        filled=True,
+        get_fill_color=tile_color_expression(data, colors, tuiles),
+        get_line_color=[100, 100, 100],
+        line_width_min_pixels=0.5,
+    )
+
+    # Les valeurs ne sont pas dans les tuiles : le tooltip affiche l'identité de l'unité
+    champs = metadata.get("champs", [])
+    tooltip_text = "{nom} ({code_insee})" if "nom" in champs else "{code_insee}"
+
+    return CompactDeck(
+        map_style="light",
+        layers=[layer],
+        initial_view_state=pdk.ViewState(**vue),
+        tooltip={"html": tooltip_text, "style": {"color": "white"}},
+    )
+
+def tooltip_labels(data, scope_mode):
+    """Libellé du tooltip de chaque unité (ex: "Ain (01)" ou le nom de la commune)."""
+    cols = [c for c in TOOLTIP_COLUMNS.get(scope_mode, []) if c in data.columns]
+    if not cols:
+        return [""] * len(data)
+    labels = data[cols[0]].astype(str)
+    for c in cols[1:]:
+        labels = labels + " (" + data[c].astype(str) + ")"
+    return labels.tolist()
+
+def get_client_geometry(data, scope_mode):
+    """
+    Géométrie de la carte côté navigateur, identifiée par une empreinte des unités affichées :
+    polygones empaquetés au niveau de détail de l'échelle (départements, ou communes si
+    leurs polygones existent), sinon positions des communes,
+    avec pour chaque partie la position de l'unité d'origine et le libellé du tooltip.
+
+    Returns:
+        dict | None: {id, type, labels, parts, unite}, ou None si la géométrie est absente.
+    """
+    cache = get_deck_cache()
+    niveau = colonne_geometrie(data, scope_mode) if has_polygons(data) else None
+    geometrie_id = make_key("geometrie", scope_mode, niveau, view_fingerprint(data))
+    payload = cache.get(geometrie_id)
+    if payload is not None:
+        return payload
+
+    if niveau is not None:
+        geometrie = data[niveau]
+        if geometrie.crs is not None and geometrie.crs.to_epsg() != 4326:
+            geometrie = geometrie.to_crs(epsg=4326)
+        packed = pack_polygons(geometrie)
+        payload = {"type": "polygones", "parts": packed["rings"], "unite": packed["unite"].tolist()}
+    elif scope_mode == "France":
+        return None
+    else:
+        if 'lon' not in data.columns or 'lat' not in data.columns:
+            return None
+        lon = data["lon"].to_numpy(dtype=float)
+        lat = data["lat"].to_numpy(dtype=float)
+        positions = np.flatnonzero(~np.isnan(lon) & ~np.isnan(lat))
+        coords = np.round(np.column_stack([lon, lat])[positions], PRECISION_COORDONNEES)
+        payload = {"type": "points", "parts": coords.tolist(), "unite": positions.tolist()}
+
+    payload.update({"id": geometrie_id, "labels": tooltip_labels(data, scope_mode)})
+    cache.put(geometrie_id, payload)
+    return payload
+
+def plot_client_map(title, col_name, data, scope_mode, type_data, df_scores=None):
+    """
+    Affiche la carte avec le composant recoloré côté navigateur.
+
+    La géométrie n'est transmise que si le navigateur ne l'a pas encore (le composant
+    renvoie l'id de la géométrie qu'il a en mémoire) ; ensuite, à chaque rerun, seuls
+    les couleurs (uint8 RGBA encodés en base64) et les valeurs du tooltip sont envoyés.
+
+    Returns:
+        tuple: (carte affichée, stats de coloration)
+    """
+    values = get_map_values(col_name, data, df_scores)
+    if data is None or data.empty or values is None:
+        st.info(f"Aucune donnée disponible pour {title} ou la colonne '{col_name}' est manquante.")
+        return False, None
+
+    compact = df_scores is None
+    vue = get_view_state(data, scope_mode, compact)
+    geometrie = get_client_geometry(data, scope_mode)
+    if geometrie is None:
+        st.error(f"Géométrie absente pour le mode {scope_mode}.")
+        return False, None
+
+    stats = get_map_stats(col_name, type_data, scope_mode, df_scores)
+    nan_color = (220, 220, 220, 60) if geometrie["type"] == "polygones" else (128, 128, 128, 100)
+    colors = get_colors(values.to_numpy(dtype=float), stats, nan_color=nan_color)
+
+    key = f"carte_{col_name}"
+    etat = st.session_state.get(key) or {}
+    deja_envoyee = etat.get("geometrie") == geometrie["id"]
+
+    _composant_carte(
+        geometrie_id=geometrie["id"],
+        geometrie=None if deja_envoyee else geometrie,
+        couleurs=base64.b64encode(np.ascontiguousarray(colors).tobytes()).decode("ascii"),
+        valeurs=to_json_list(values.round(2).to_numpy(dtype=float)),
+        vue=vue,
+        height=300 if compact else 500,
+        key=key,
+        default=None,
+    )
+    return True, stats
+
+def get_grille_hexagonale(data):
+    """
+    Grille d'hexagones des communes affichées, construite une seule fois par ensemble de communes.
+    Les agrégations par scénario sont ensuite gardées en cache par la grille elle-même.
+    """
+    cache = get_deck_cache()
+    cle = make_key("grille", view_fingerprint(data), TAILLE_HEXAGONE)
+    grille = cache.get(cle)
+    if grille is None:
+        poids = data["population_totale"] if "population_totale" in data.columns else np.ones(len(data))
+        grille = GrilleHexagonale(
+            pd.to_numeric(data["lon"], errors='coerce'),
+            pd.to_numeric(data["lat"], errors='coerce'),
+            pd.to_numeric(pd.Series(poids), errors='coerce'),
+            TAILLE_HEXAGONE,
+        )
+        cache.put(cle, grille)
+    return grille
+
+def has_polygons(data):
+    """Indique si data porte des polygones (au moins un niveau de détail)."""
+    return any(c in data.columns for c in NIVEAUX_DETAIL)
+
+def colonne_geometrie(data, scope_mode):
+    """
+    Colonne géométrique à afficher hors tuiles vectorielles : la vue s'ouvre à un zoom fixe
+    par échelle, un seul niveau de détail est donc utilisé (voir GEOMETRIE_AFFICHEE).
+    À défaut, le niveau le plus grossier présent dans data.
+    """
+    colonne = GEOMETRIE_AFFICHEE.get(scope_mode)
+    if colonne in data.columns:
+        return colonne
+    return next(c for c in NIVEAUX_DETAIL if c in data.columns)
+
+def get_view_state(data, scope_mode, compact=False):
+    """
+    État initial de la vue : centre de la France en mode France,
+    centre du département (centroïde de la partition, sinon moyenne des communes) en mode Département.
+    """
+    if scope_mode != "Département":
+        return {"latitude": 46.6, "longitude": -1 if compact else 2.2, "zoom": 3.5 if compact else 4, "pitch": 0}
+
+    centroide = data.attrs.get("centroide")
+    if centroide is not None:
+        centre_lon, centre_lat = centroide
+    elif {"lon", "lat"}.issubset(data.columns) and data[["lon", "lat"]].notna().all(axis=1).any():
+        valides = data[["lon", "lat"]].dropna()
+        centre_lon, centre_lat = valides["lon"].astype(float).mean(), valides["lat"].astype(float).mean()
+    else:
+        centre_lon, centre_lat = None, None
+
+    return {
+        "latitude": centre_lat if centre_lat is not None else 46.6,
+        "longitude": centre_lon - 0.1 if centre_lon is not None else 2.1 if compact else 2.2,
+        "zoom": 6.8 if compact else 7.5,
+        "pitch": 0,
+    }
+
+def build_map_deck(title, col_name, data, values, stats, scope_mode, compact=False):
+    """
+    Construit la carte PyDeck d'une colonne.
+
+    Args:
+        data (pd.DataFrame): Les unités (géométrie ou lon/lat, colonnes du tooltip), non copiées.
+        values (pd.Series): Les valeurs à cartographier, alignées sur l'index de data.
+        stats (dict | None): Stats de coloration (p5/p95/order_normal).
+        compact (bool): Petite carte (variables) plutôt que grande carte (scores).
+    """
+    print(f"🔄 Construction de la carte pour {title} en mode {scope_mode}")
+
+    # Colonnes transmises au navigateur : uniquement celles du tooltip
+    tooltip_cols = [c for c in TOOLTIP_COLUMNS.get(scope_mode, []) if c in data.columns]
+
+    # Détermination de l'état initial de la vue
+    vue = get_view_state(data, scope_mode, compact)
+    initial_view_state = pdk.ViewState(**vue)
+
     # ----------------------------------------------------------------
-    # CAS 1: MODE FRANCE
+    # CAS 0: FRANCE ENTIÈRE À L'ÉCHELLE DES COMMUNES (HEXAGONES AGRÉGÉS)
     # ----------------------------------------------------------------
-    if scope_mode == "France":
-        if "geometry" not in data_plot.columns:
-            st.error("La colonne 'geometry' est absente du DataFrame pour le mode France.")
+    if scope_mode == "France (communes)":
+        if 'lon' not in data.columns or 'lat' not in data.columns:
+            st.error("Les colonnes 'lon' et 'lat' sont manquantes. Assurez-vous d'avoir enrichi les données des communes.")
             return
 
-        # S'assurer que c'est bien un GeoDataFrame
-        if not isinstance(data_plot, gpd.GeoDataFrame):
-            data_plot = gpd.GeoDataFrame(data_plot, geometry="geometry", crs="EPSG:4326")
+        # Les communes sont regroupées côté serveur : le navigateur ne reçoit que les hexagones
+        grille = get_grille_hexagonale(data)
+        valeurs_hex = grille.agreger(values.to_numpy(dtype=float))
+        colors = get_colors(valeurs_hex, stats, nan_color=(220, 220, 220, 60))
 
-        # S'assurer qu'on est bien en WGS84 (lat/lon)
-        if data_plot.crs is None or data_plot.crs.to_epsg() != 4326:
-            data_plot = data_plot.to_crs(epsg=4326)
+        records = to_records(
+            {
+                # 3 décimales (~100 m) suffisent pour des hexagones de plusieurs kilomètres
+                "polygon": np.round(grille.polygones(), 3),
+                col_name: valeurs_hex,
+                "nb_communes": grille.nb_communes,
+                "population": np.round(grille.population).astype(np.int64),
+                "fill_color": colors,
+            },
+            grille.nb_cellules,
+        )
 
-        # Virer les géométries vides
-        data_plot = data_plot.dropna(subset=["geometry"]).copy()
+        layer = pdk.Layer(
+            "PolygonLayer",
+            data=records,
+            pickable=True,
+            stroked=False,
+            filled=True,
+            get_polygon="polygon",
+            get_fill_color="fill_color",
+        )
 
-        # Simplifier les polygones pour alléger l'affichage
-        data_plot["geometry"] = data_plot["geometry"].simplify(tolerance=0.02, preserve_topology=True)
+    # ----------------------------------------------------------------
+    # CAS 1: CHOROPLÈTHE (départements, ou communes si leurs polygones sont disponibles)
+    # ----------------------------------------------------------------
+    elif has_polygons(data):
+        # Niveau de détail de l'échelle affichée
+        geometrie = data[colonne_geometrie(data, scope_mode)]
+        if geometrie.crs is not None and geometrie.crs.to_epsg() != 4326:
+            geometrie = geometrie.to_crs(epsg=4326)
 
-        # Colonne code département (pour tooltip)
-        if "DEP" not in data_plot.columns:
-            if "code_insee" in data_plot.columns:
-                data_plot["DEP"] = data_plot["code_insee"].astype(str).str.zfill(2)
-            else:
-                data_plot["DEP"] = ""
+        # Géométrie empaquetée une seule fois (anneaux de coordonnées arrondies, en cache) :
+        # seules les valeurs, les couleurs et les champs du tooltip changent d'une carte à l'autre
+        packed = pack_polygons(geometrie)
+        unite = packed["unite"]
 
-        def _color_or_default(x):
-            if pd.isna(x):
-                # gris clair si pas de valeur
-                return [220, 220, 220, 60]
-            return get_color_scale(x, col_name, type_data, scope_mode, df_scores=df_scores)
-        
-        data_plot['fill_color'] = data_plot[col_name].apply(_color_or_default)
+        # gris clair si pas de valeur
+        colors = get_colors(values.to_numpy(dtype=float), stats, nan_color=(220, 220, 220, 60))
+
+        records = to_records(
+            {
+                **{c: data[c].to_numpy()[unite] for c in tooltip_cols},
+                col_name: values.to_numpy(dtype=float)[unite],
+                "fill_color": colors[unite],
+            },
+            len(unite),
+        )
+        for record, anneaux in zip(records, packed["rings"]):
+            record["polygon"] = anneaux
 
-        geojson_dict = json.loads(data_plot.to_json())
-        
         layer = pdk.Layer(
-            "GeoJsonLayer",
-            data=geojson_dict,
+            "PolygonLayer",
+            data=records,
             pickable=True,
             stroked=True,
             filled=True,
-            get_fill_color="properties.fill_color",
+            get_polygon="polygon",
+            get_fill_color="fill_color",
             get_line_color=[100, 100, 100],
             line_width_min_pixels=0.5,
         )
 
+    elif scope_mode == "France":
+        st.error("La colonne 'geometry' est absente du DataFrame pour le mode France.")
+        return
 
-    
     # ----------------------------------------------------------------
-    # CAS 2: MODE DÉPARTEMENT (CARTE À POINTS DES COMMUNES)
+    # CAS 2: MODE DÉPARTEMENT SANS POLYGONES (CARTE À POINTS DES COMMUNES)
     # ----------------------------------------------------------------
     elif scope_mode == "Département":
 
-        if 'lon' not in data_plot.columns or 'lat' not in data_plot.columns:
+        if 'lon' not in data.columns or 'lat' not in data.columns:
             st.error("Les colonnes 'lon' et 'lat' sont manquantes. Assurez-vous d'avoir enrichi les données des communes.")
             return
 
-        # Nettoyage des coordonnées (éviter les NaNs)
-        data_plot = data_plot.dropna(subset=['lon', 'lat']).copy()
-        
-    
-        data_plot['fill_color'] = data_plot[col_name].apply(
-            lambda x: get_color_scale(x, col_name, type_data, scope_mode, df_scores=df_scores)
-        )
-        
-        # Adapter la vue au centre du département sélectionné
-        initial_view_state = pdk.ViewState(
-            latitude=data_plot["lat"].mean() if not data_plot.empty else 46.6,
-            longitude=data_plot["lon"].mean() - 0.1 if not data_plot.empty else 2.1 if df_scores is None else 2.2,
-            zoom=6.8 if df_scores is None else 7.5,
-            pitch=0,
+        # Seuls les champs utiles partent vers le navigateur : position arrondie, tooltip, valeur, couleur
+        lon = data["lon"].to_numpy(dtype=float)
+        lat = data["lat"].to_numpy(dtype=float)
+        positions = np.flatnonzero(~np.isnan(lon) & ~np.isnan(lat))
+
+        colors = get_colors(values.to_numpy(dtype=float), stats)
+        records = to_records(
+            {
+                "position": np.round(np.column_stack([lon, lat])[positions], PRECISION_COORDONNEES),
+                **{c: data[c].to_numpy()[positions] for c in tooltip_cols},
+                col_name: values.to_numpy(dtype=float)[positions],
+                "fill_color": colors[positions],
+            },
+            len(positions),
         )
 
-        # La ScatterplotLayer utilise lat/lon pour la visualisation des points
+        # La ScatterplotLayer utilise la position [lon, lat] pour la visualisation des points
         layer = pdk.Layer(
             "ScatterplotLayer",
-            data=data_plot,
-            get_position=['lon', 'lat'],
+            data=records,
+            get_position="position",
             get_fill_color="fill_color",
             get_radius=2000, # Taille fixe des points
             pickable=True,
@@ -231,11 +587,13 @@ def build_map_deck(title, col_name, _data, scope_mode, type_data, _df_scores=Non
 
     # Ajout du Tooltip pour l'interaction
     if scope_mode == "Département":
-        tooltip_text = f"{{{data.columns[1]}}} : {{{col_name}}}"
+        tooltip_text = f"{{nom_commune}} : {{{col_name}}}"
+    elif scope_mode == "France (communes)":
+        tooltip_text = f"{{nb_communes}} communes ({{population}} hab.) : {{{col_name}}}"
     else:
-        tooltip_text = f"{{{data.columns[8]}}} ({{{data.columns[1]}}}) : {{{col_name}}}"
+        tooltip_text = f"{{nom_departement}} ({{code_insee}}) : {{{col_name}}}"
     
-    return pdk.Deck(
+    return CompactDeck(
         map_style="light",
         layers=[layer],
         initial_view_state=initial_view_state,